@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Startup benchmark with an import-time budget.
+
+Imports each ``--module`` in fresh interpreters under ``-X importtime``
+several times, reports the median wall-clock startup and cumulative import
+time plus the slowest top-level imports, and exits non-zero when any
+module's median import time exceeds ``--budget-ms``.
+
+Interpreter startup (``site``, ``encodings``, ...) is not charged to the
+module: a bare ``python -c pass`` is sampled too, the modules it imports are
+left out of the import time, and its wall-clock time is subtracted from the
+startup figure. ``-S`` would skip ``site`` as well, but then site-packages
+dependencies could not be imported.
+
+The BYOB Makefiles run it from a handler directory through
+``make import-budget``, and ``make gen-udf`` runs that target first:
+
+    python3 ../benchmarks/import_budget.py --module sample_udf --module serdes_utils.zygote --path . --budget-ms 150
+
+secure-invoke uses the same script for its entry point:
+
+    python ../../byob/python/benchmarks/import_budget.py --module invoke --path . --budget-ms 400
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S.*)$")
+
+
+def parse_importtime(stderr: str, startup: Optional[Set[str]] = None) -> Tuple[int, Dict[str, int]]:
+    """Return (total cumulative us of top-level imports, cumulative us per import).
+
+    Top-level imports named in ``startup`` are skipped along with everything
+    they imported. The per-import map holds top-level imports and their direct
+    children, which is where lazy-loading opportunities show up.
+    """
+    startup = startup or set()
+    total = 0
+    modules: Dict[str, int] = {}
+    # -X importtime prints children before their parent.
+    children: List[Tuple[str, int]] = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4).strip()
+        # Each nesting level is indented by two spaces after one leading space.
+        if len(indent) > 1:
+            if len(indent) <= 3:
+                children.append((name, cumulative))
+            continue
+        if name not in startup:
+            total += cumulative
+            for child, us in children + [(name, cumulative)]:
+                modules[child] = modules.get(child, 0) + us
+        children = []
+    return total, modules
+
+
+def startup_imports(stderr: str) -> Set[str]:
+    """Top-level modules imported by interpreter startup alone."""
+    names = set()
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match and len(match.group(3)) == 1:
+            names.add(match.group(4).strip())
+    return names
+
+
+def run_importtime(code: str, path: str, python: str) -> Tuple[float, str]:
+    """Run ``code`` under ``-X importtime``; return (wall ms, stderr)."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [path, env.get("PYTHONPATH", "")]))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"{code} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    return wall_ms, proc.stderr
+
+
+def measure(module: str, args: argparse.Namespace) -> float:
+    """Sample ``module``, print its report and return the median import ms."""
+    baselines: List[float] = []
+    walls: List[float] = []
+    totals: List[int] = []
+    slowest: Dict[str, List[int]] = {}
+    for _ in range(max(1, args.repeat)):
+        baseline_ms, baseline_stderr = run_importtime("pass", args.path, args.python)
+        baselines.append(baseline_ms)
+        wall_ms, stderr = run_importtime(f"import {module}", args.path, args.python)
+        total_us, modules = parse_importtime(stderr, startup_imports(baseline_stderr))
+        walls.append(wall_ms)
+        totals.append(total_us)
+        for name, us in modules.items():
+            slowest.setdefault(name, []).append(us)
+
+    import_ms = statistics.median(totals) / 1000
+    startup_ms = statistics.median(walls) - statistics.median(baselines)
+    print(
+        f"{module}: median startup {startup_ms:.1f} ms over a bare interpreter "
+        f"({statistics.median(baselines):.1f} ms), median imports {import_ms:.1f} ms"
+    )
+    ranked = sorted(
+        ((name, samples) for name, samples in slowest.items() if name != module),
+        key=lambda item: statistics.median(item[1]),
+        reverse=True,
+    )
+    for name, samples in ranked[: args.top]:
+        print(f"  {statistics.median(samples) / 1000:8.1f} ms  {name}")
+    return import_ms
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure entry-point import time against a budget")
+    parser.add_argument(
+        "--module", action="append", required=True, help="Module to import, e.g. invoke; repeat for several"
+    )
+    parser.add_argument("--path", default=".", help="Directory added to PYTHONPATH")
+    parser.add_argument(
+        "--budget-ms", type=float, default=0.0, help="Fail when any module's median import time exceeds this"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Number of fresh interpreters to sample")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to print")
+    parser.add_argument("--python", default=sys.executable, help="Interpreter to benchmark")
+    args = parser.parse_args()
+
+    status = 0
+    for module in args.module:
+        try:
+            import_ms = measure(module, args)
+        except RuntimeError as exc:
+            print(f"✗ {exc}", file=sys.stderr)
+            status = 1
+            continue
+        if args.budget_ms and import_ms > args.budget_ms:
+            print(f"✗ {module}: import time {import_ms:.1f} ms exceeds budget {args.budget_ms:g} ms", file=sys.stderr)
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
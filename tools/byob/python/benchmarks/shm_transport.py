@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Round-trip throughput of the shared-memory transport versus the fd path.
+
+A child process echoes every request back. The fd path writes length-prefixed
+messages through a Unix socketpair (two kernel copies each way); the shm path
+uses serdes_utils.shm_transport. Run from tools/byob/python:
+
+    python3 benchmarks/shm_transport.py --sizes 4096,262144,1048576,8388608 --iterations 200
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serdes_utils.shm_transport import (  # noqa: E402
+    ShmChannel,
+    read_request_from_shm,
+    read_response_from_shm,
+    write_request_to_shm,
+)
+
+_LENGTH = struct.Struct('<I')
+
+
+def _read_exact(fd, length):
+    data = bytearray()
+    while len(data) < length:
+        chunk = os.read(fd, length - len(data))
+        if not chunk:
+            raise EOFError("peer closed")
+        data.extend(chunk)
+    return data
+
+
+def _fd_send(fd, payload):
+    view = memoryview(_LENGTH.pack(len(payload)) + payload)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _fd_recv(fd):
+    return _read_exact(fd, _LENGTH.unpack(_read_exact(fd, _LENGTH.size))[0])
+
+
+def _echo_fd(fd):
+    try:
+        while True:
+            _fd_send(fd, _fd_recv(fd))
+    except EOFError:
+        pass
+
+
+def _echo_shm(handle):
+    channel = ShmChannel.attach(handle)
+    try:
+        while True:
+            request = read_request_from_shm(channel)
+            if not request:
+                break
+            channel.responses.send(request)
+    finally:
+        channel.close()
+
+
+def _bench(send, recv, payload, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        send(payload)
+        response = recv()
+        samples.append(time.perf_counter() - start)
+        if len(response) != len(payload):
+            raise RuntimeError("echo size mismatch")
+    return samples
+
+
+def _report(name, size, samples):
+    median = statistics.median(samples)
+    throughput = 2 * size / median / (1024 * 1024)
+    print(f"{name:4s} {size:>10d} B   median {median * 1e6:10.1f} us   {throughput:9.1f} MiB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark shared-memory vs fd transport for BYOB payloads')
+    parser.add_argument('--sizes', default='4096,262144,1048576,8388608', help='Comma-separated payload sizes')
+    parser.add_argument('--iterations', type=int, default=200, help='Round trips per size (default: 200)')
+    parser.add_argument('--child-fd', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--child-shm', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_fd is not None:
+        _echo_fd(args.child_fd)
+        return 0
+    if args.child_shm is not None:
+        _echo_shm(args.child_shm)
+        return 0
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    script = os.path.abspath(__file__)
+
+    parent_sock, child_sock = socket.socketpair()
+    fd_child = subprocess.Popen([sys.executable, script, '--child-fd', str(child_sock.fileno())],
+                                pass_fds=[child_sock.fileno()])
+    child_sock.close()
+
+    channel = ShmChannel.create(capacity=max(sizes) * 2 + 64)
+    shm_child = subprocess.Popen([sys.executable, script, '--child-shm', channel.handle()],
+                                 pass_fds=channel.fds)
+    try:
+        fd = parent_sock.fileno()
+        for size in sizes:
+            payload = os.urandom(size)
+            _bench(lambda p: _fd_send(fd, p), lambda: _fd_recv(fd), payload, 5)
+            _report('fd', size, _bench(lambda p: _fd_send(fd, p), lambda: _fd_recv(fd), payload, args.iterations))
+            send = lambda p: write_request_to_shm(channel, p)  # noqa: E731
+            recv = lambda: read_response_from_shm(channel)  # noqa: E731
+            _bench(send, recv, payload, 5)
+            _report('shm', size, _bench(send, recv, payload, args.iterations))
+    finally:
+        parent_sock.close()
+        write_request_to_shm(channel, b'')
+        fd_child.wait()
+        shm_child.wait()
+        channel.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
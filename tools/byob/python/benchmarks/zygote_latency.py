@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Spawn-to-response latency of a cold `python3 script.py <fd>` versus the zygote.
+
+Run from a handler directory that has generate_bid_pb2.py and a serialized
+request, e.g. in sample_ml_model after `make json-proto train-model`:
+
+    python3 ../benchmarks/zygote_latency.py --handler credit_card_inference \
+        --request ./sample_req_data/get_bid_request.proto --iterations 50
+
+Modes:
+    cold            python3 <handler>.py <fd>
+    zygote-cli      python3 -m serdes_utils.zygote launch --socket ... <fd>
+    zygote-inproc   serdes_utils.zygote.launch() from this process, i.e. the
+                    fork-to-response floor a native launcher would see
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from serdes_utils.zygote import launch
+
+
+def _timed(run, request, workdir):
+    path = os.path.join(workdir, 'request.proto')
+    shutil.copyfile(request, path)
+    fd = os.open(path, os.O_RDWR)
+    try:
+        start = time.perf_counter()
+        status = run(fd)
+        elapsed = (time.perf_counter() - start) * 1000
+    finally:
+        os.close(fd)
+    if status != 0:
+        raise RuntimeError(f"handler exited with status {status}")
+    return elapsed
+
+
+def _report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(f"{name:14s} median {statistics.median(samples):8.2f} ms   p95 {p95:8.2f} ms   "
+          f"min {samples[0]:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark zygote vs cold-start BYOB handler latency')
+    parser.add_argument('--handler', required=True, help='Handler module in the current directory')
+    parser.add_argument('--request', required=True, help='Serialized request file (as written by json-proto)')
+    parser.add_argument('--iterations', type=int, default=30, help='Requests per mode (default: 30)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    socket_path = os.path.join(workdir, 'zygote.sock')
+    quiet = {'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+    zygote = subprocess.Popen([sys.executable, '-m', 'serdes_utils.zygote', 'serve',
+                               '--handler', args.handler, '--socket', socket_path], **quiet)
+    try:
+        deadline = time.time() + 60
+        while not os.path.exists(socket_path):
+            if zygote.poll() is not None or time.time() > deadline:
+                print("✗ zygote failed to start", file=sys.stderr)
+                return 1
+            time.sleep(0.05)
+
+        modes = {
+            'cold': lambda fd: subprocess.run([sys.executable, f'{args.handler}.py', str(fd)],
+                                              pass_fds=(fd,), **quiet).returncode,
+            'zygote-cli': lambda fd: subprocess.run(
+                [sys.executable, '-m', 'serdes_utils.zygote', 'launch', '--socket', socket_path, str(fd)],
+                pass_fds=(fd,), **quiet).returncode,
+            'zygote-inproc': lambda fd: launch(socket_path, fd),
+        }
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        saved = os.dup(1), os.dup(2)
+        for name, run in modes.items():
+            # Keep handler output (inherited by the in-process launch) off the report
+            os.dup2(devnull, 1)
+            os.dup2(devnull, 2)
+            try:
+                samples = [_timed(run, args.request, workdir) for _ in range(args.iterations)]
+            finally:
+                os.dup2(saved[0], 1)
+                os.dup2(saved[1], 2)
+            _report(name, samples)
+        return 0
+    finally:
+        zygote.terminate()
+        zygote.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import argparse
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from train_credit_card_model import FEATURES, TARGET, credit_score_formula
+
+def generate_chunk(seed, part, chunk, rows):
+    """Generate one chunk of synthetic rows; each (seed, part, chunk) is reproducible"""
+    rng = np.random.default_rng([seed, part, chunk])
+    ages = rng.integers(20, 91, size=rows)
+    avg_amounts = rng.integers(10000, 100001, size=rows)
+    total_spents = rng.integers(50000, 1000001, size=rows)
+    scores = credit_score_formula(ages, avg_amounts, total_spents)
+    return ages, avg_amounts, total_spents, scores
+
+def write_part(task):
+    """Write one part file of `rows` rows in chunks so memory stays bounded"""
+    output_dir, fmt, seed, part, rows, chunk_size = task
+    path = os.path.join(output_dir, f'part-{part:05d}.{fmt}')
+    writer = None
+    with open(path, 'wb') as f:
+        if fmt == 'csv':
+            f.write((','.join(FEATURES + [TARGET]) + '\n').encode('utf-8'))
+        for chunk, start in enumerate(range(0, rows, chunk_size)):
+            columns = generate_chunk(seed, part, chunk, min(chunk_size, rows - start))
+            if fmt == 'csv':
+                np.savetxt(f, np.column_stack(columns), delimiter=',', fmt=['%d', '%d', '%d', '%.6f'])
+            else:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.table(dict(zip(FEATURES + [TARGET], columns)))
+                if writer is None:
+                    writer = pq.ParquetWriter(f, table.schema)
+                writer.write_table(table)
+        if writer is not None:
+            writer.close()
+    return path, rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic credit card training data at scale')
+    parser.add_argument('--rows', type=int, required=True, help='Total rows to generate')
+    parser.add_argument('--output-dir', type=str, default='./training_data',
+                        help='Directory for part files (default: ./training_data)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help='Output format (default: csv)')
+    parser.add_argument('--parts', type=int, default=None,
+                        help='Number of part files (default: one per worker)')
+    parser.add_argument('--workers', type=int, default=None, help='Processes to use (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=1000000,
+                        help='Rows generated per chunk; also the Parquet row group size (default: 1000000)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count() or 1
+    parts = args.parts or workers
+    os.makedirs(args.output_dir, exist_ok=True)
+    tasks = [(args.output_dir, args.format, args.seed, part,
+              args.rows * (part + 1) // parts - args.rows * part // parts, args.chunk_size)
+             for part in range(parts)]
+
+    started = time.time()
+    with Pool(min(workers, parts)) as pool:
+        for path, rows in pool.imap_unordered(write_part, tasks):
+            print(f"Wrote {rows} rows to {path}")
+    elapsed = time.time() - started
+    print(f"Generated {args.rows} rows in {elapsed:.1f}s ({args.rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    return 0
+
+if __name__ == "__main__":
+    main()
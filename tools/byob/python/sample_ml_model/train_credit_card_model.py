@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pickle
+import os
+import glob
+import hashlib
+import json
+import time
+import uuid
+from multiprocessing import Pool
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+import argparse
+
+FEATURES = ['age', 'avg_amount_spent', 'total_spent']
+TARGET = 'credit_score'
+
+def credit_score_formula(ages, avg_amounts, total_spents):
+    """Synthetic credit score (1-100) used for training and benchmark data"""
+    return (
+        (ages - 20) / 70 * 20 +  # Age contribution (max 20 points)
+        avg_amounts / 100000 * 40 +  # Avg amount contribution (max 40 points)
+        total_spents / 1000000 * 40  # Total spent contribution (max 40 points)
+    )
+
+def create_training_data():
+    """Create synthetic training data for the linear regression model"""
+    # Create synthetic data based on the provided ranges
+    np.random.seed(42)  # For reproducibility
+    
+    # Generate 100 samples with age between 20-90, avg_amount_spent between 10000-100000, 
+    # and total_spent between 50000-1000000
+    ages = np.random.randint(20, 91, size=100)
+    avg_amounts = np.random.randint(10000, 100001, size=100)
+    total_spents = np.random.randint(50000, 1000001, size=100)
+    
+    # Features matrix
+    X = np.column_stack((ages, avg_amounts, total_spents))
+    
+    # Generate target values (credit score from 1-100, higher is better)
+    # This is a simplistic model where:
+    # - Age contributes moderately (older = slightly better score up to a point)
+    # - Average spending contributes significantly
+    # - Total spent contributes significantly
+    credit_scores = credit_score_formula(ages, avg_amounts, total_spents)
+    
+    return X, credit_scores
+
+def train_model(output_dir='./models'):
+    """Train and save the linear regression model and scaler"""
+    print("Generating training data...")
+    X, y = create_training_data()
+    
+    # Standardize features
+    print("Training model...")
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    
+    # Train the model
+    model = LinearRegression()
+    model.fit(X_scaled, y)
+    
+    # Create output directory if it doesn't exist
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # Save the model and scaler
+    print(f"Saving model to {output_dir}...")
+    with open(os.path.join(output_dir, 'credit_card_model.pkl'), 'wb') as f:
+        pickle.dump(model, f)
+    
+    with open(os.path.join(output_dir, 'credit_card_scaler.pkl'), 'wb') as f:
+        pickle.dump(scaler, f)
+    
+    print("Model training and saving complete.")
+    return model, scaler
+
+class RunningMoments:
+    """Running count, mean and co-moment matrix of [features..., target].
+
+    Chunks are folded in with the pairwise update of Chan et al., so partial
+    results from different processes can be merged without revisiting data and
+    without the cancellation error of raw sums of squares.
+    """
+
+    def __init__(self, width):
+        self.n = 0
+        self.mean = np.zeros(width)
+        self.comoment = np.zeros((width, width))
+
+    def update(self, block):
+        """Fold a (rows, width) array into the running moments"""
+        if len(block) == 0:
+            return
+        other = RunningMoments(block.shape[1])
+        other.n = len(block)
+        other.mean = block.mean(axis=0)
+        centered = block - other.mean
+        other.comoment = centered.T @ centered
+        self.merge(other)
+
+    def merge(self, other):
+        """Combine moments from another (disjoint) set of rows"""
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.n, self.mean, self.comoment = other.n, other.mean.copy(), other.comoment.copy()
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (other.n / n)
+        self.comoment = self.comoment + other.comoment + np.outer(delta, delta) * (self.n * other.n / n)
+        self.n = n
+
+def fit_from_moments(moments):
+    """Build a fitted StandardScaler and LinearRegression from running moments
+
+    Solves the normal equations on standardized features in closed form, which
+    gives the same model as StandardScaler + LinearRegression.fit on all rows.
+    """
+    k = len(FEATURES)
+    cov = moments.comoment / moments.n
+    var = np.diag(cov)[:k].copy()
+    scale = np.sqrt(var)
+    scale[scale == 0.0] = 1.0
+
+    scaler = StandardScaler()
+    scaler.mean_ = moments.mean[:k].copy()
+    scaler.var_ = var
+    scaler.scale_ = scale
+    scaler.n_samples_seen_ = moments.n
+    scaler.n_features_in_ = k
+
+    # Covariances of the standardized features and of features with the target
+    cov_zz = cov[:k, :k] / np.outer(scale, scale)
+    cov_zy = cov[:k, k] / scale
+    coef, _, rank, singular = np.linalg.lstsq(cov_zz, cov_zy, rcond=None)
+
+    model = LinearRegression()
+    model.coef_ = coef
+    model.intercept_ = float(moments.mean[k])
+    model.rank_ = int(rank)
+    model.singular_ = singular
+    model.n_features_in_ = k
+    return model, scaler
+
+def _byte_range_lines(path, start, end):
+    """Yield the lines of a file whose first byte falls in [start, end)"""
+    with open(path, 'rb') as f:
+        pos = start
+        if start > 0:
+            f.seek(start - 1)
+            if f.read(1) != b'\n':
+                pos += len(f.readline())
+        while pos < end:
+            line = f.readline()
+            if not line:
+                break
+            pos += len(line)
+            yield line
+
+def _csv_columns(path):
+    """Column indexes of features and target, and the header length in bytes"""
+    with open(path, 'rb') as f:
+        first_line = f.readline()
+    header = [name.strip() for name in first_line.decode('utf-8').split(',')]
+    missing = [name for name in FEATURES + [TARGET] if name not in header]
+    if missing:
+        raise ValueError(f"{path}: missing columns {missing}")
+    return [header.index(name) for name in FEATURES + [TARGET]], len(first_line)
+
+def _csv_task_moments(task):
+    """Moments for one byte range of a CSV file, read chunk_size rows at a time"""
+    path, start, end, chunk_size = task
+    columns, header_len = _csv_columns(path)
+    moments = RunningMoments(len(columns))
+    chunk = []
+    for line in _byte_range_lines(path, max(start, header_len), end):
+        if line.strip():
+            chunk.append(line.decode('utf-8'))
+        if len(chunk) >= chunk_size:
+            moments.update(np.loadtxt(chunk, delimiter=',', usecols=columns, ndmin=2))
+            chunk = []
+    if chunk:
+        moments.update(np.loadtxt(chunk, delimiter=',', usecols=columns, ndmin=2))
+    return moments
+
+def _parquet_task_moments(task):
+    """Moments for one Parquet row group, read chunk_size rows at a time"""
+    import pyarrow.parquet as pq
+
+    path, row_group, chunk_size = task
+    moments = RunningMoments(len(FEATURES) + 1)
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, row_groups=[row_group],
+                                           columns=FEATURES + [TARGET]):
+        block = np.column_stack([batch.column(name).to_numpy(zero_copy_only=False)
+                                 for name in FEATURES + [TARGET]]).astype(np.float64)
+        moments.update(block)
+    return moments
+
+def _plan_tasks(paths, chunk_size, workers):
+    """Split inputs into independent tasks: CSV byte ranges and Parquet row groups"""
+    tasks = []
+    for path in paths:
+        if path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+
+            for row_group in range(pq.ParquetFile(path).num_row_groups):
+                tasks.append((_parquet_task_moments, (path, row_group, chunk_size)))
+        else:
+            size = os.path.getsize(path)
+            # A few ranges per worker keeps processes busy when files differ in size
+            parts = max(1, min(workers * 4, size // (64 * 1024 * 1024) + 1))
+            for i in range(parts):
+                tasks.append((_csv_task_moments, (path, size * i // parts, size * (i + 1) // parts, chunk_size)))
+    return tasks
+
+def _run_task(task):
+    fn, args = task
+    return fn(args)
+
+def expand_inputs(inputs):
+    """Expand files, directories and glob patterns into CSV/Parquet paths"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            matches = glob.glob(os.path.join(item, '*.csv')) + glob.glob(os.path.join(item, '*.parquet'))
+        else:
+            matches = glob.glob(item)
+        paths.extend(sorted(matches))
+    if not paths:
+        raise ValueError(f"No CSV or Parquet input found in {inputs}")
+    return paths
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def save_versioned_artifact(model, scaler, output_dir, version, metadata):
+    """Write models under output_dir/versions/<version>/ and refresh the top-level copies
+
+    The top-level credit_card_model.pkl / credit_card_scaler.pkl stay in place
+    for credit_card_inference.py; LATEST names the version they came from.
+    Raises FileExistsError rather than overwrite an existing version.
+    """
+    os.makedirs(os.path.join(output_dir, 'versions'), exist_ok=True)
+    version_dir = os.path.join(output_dir, 'versions', version)
+    os.mkdir(version_dir)
+    files = {}
+    for name, obj in (('credit_card_model.pkl', model), ('credit_card_scaler.pkl', scaler)):
+        path = os.path.join(version_dir, name)
+        with open(path, 'wb') as f:
+            pickle.dump(obj, f)
+        files[name] = _sha256(path)
+
+    manifest = dict(metadata, version=version, features=FEATURES, target=TARGET, files=files,
+                    coef=[float(c) for c in model.coef_], intercept=float(model.intercept_))
+    with open(os.path.join(version_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Per-process temp names so parallel runs do not write into each other's files.
+    suffix = f'.{os.getpid()}.tmp'
+    for name, obj in (('credit_card_model.pkl', model), ('credit_card_scaler.pkl', scaler)):
+        tmp_path = os.path.join(output_dir, name + suffix)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(obj, f)
+        os.replace(tmp_path, os.path.join(output_dir, name))
+    tmp_path = os.path.join(output_dir, 'LATEST' + suffix)
+    with open(tmp_path, 'w') as f:
+        f.write(version + '\n')
+    os.replace(tmp_path, os.path.join(output_dir, 'LATEST'))
+    return version_dir
+
+def train_model_streaming(inputs, output_dir='./models', chunk_size=1000000, workers=None, version=None):
+    """Train from CSV/Parquet inputs too large for memory, using all CPU cores
+
+    Each worker streams its byte range or row group in chunks and returns running
+    moments; the merged moments give the scaler and regression in closed form.
+    """
+    workers = workers or os.cpu_count() or 1
+    paths = expand_inputs(inputs)
+    tasks = _plan_tasks(paths, chunk_size, workers)
+    print(f"Training from {len(paths)} file(s) in {len(tasks)} task(s) on {workers} worker(s)...")
+
+    started = time.time()
+    moments = RunningMoments(len(FEATURES) + 1)
+    if workers == 1:
+        for task in tasks:
+            moments.merge(_run_task(task))
+    else:
+        with Pool(workers) as pool:
+            for partial in pool.imap_unordered(_run_task, tasks):
+                moments.merge(partial)
+    if moments.n == 0:
+        raise ValueError("Training input contains no rows")
+
+    model, scaler = fit_from_moments(moments)
+    elapsed = time.time() - started
+    print(f"Fitted on {moments.n} rows in {elapsed:.1f}s ({moments.n / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    os.makedirs(output_dir, exist_ok=True)
+    version = version or f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+    version_dir = save_versioned_artifact(model, scaler, output_dir, version, {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'rows': int(moments.n),
+        'inputs': paths,
+        'training_seconds': round(elapsed, 3),
+    })
+    print(f"Saved model version {version} to {version_dir}")
+    return model, scaler
+
+def main():
+    parser = argparse.ArgumentParser(description='Train a linear regression model for credit card offers')
+    parser.add_argument('--output-dir', type=str, default='./models',
+                        help='Directory to save the trained model (default: ./models)')
+    parser.add_argument('--input', type=str, nargs='+',
+                        help='CSV/Parquet files, directories or globs to stream instead of the built-in sample')
+    parser.add_argument('--chunk-size', type=int, default=1000000,
+                        help='Rows read per chunk in streaming mode (default: 1000000)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processes used in streaming mode (default: CPU count)')
+    parser.add_argument('--version', type=str, default=None,
+                        help='Model artifact version in streaming mode; must not exist yet '
+                             '(default: UTC timestamp plus a random suffix)')
+    args = parser.parse_args()
+    
+    if args.input:
+        train_model_streaming(args.input, args.output_dir, args.chunk_size, args.workers, args.version)
+    else:
+        train_model(args.output_dir)
+    return 0
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Shared-memory request/response transport for co-located BYOB handlers.
+
+A channel is one multiprocessing.shared_memory segment holding two
+single-producer/single-consumer byte rings: requests (caller -> handler) and
+responses (handler -> caller). Messages are stored as a 4-byte little-endian
+length followed by the payload, wrapping around the end of the ring. Payloads
+never pass through the kernel; only small wake-ups do, over eventfd (Linux)
+or a pipe.
+
+Caller side:
+    channel = ShmChannel.create(capacity=16 * 1024 * 1024)
+    subprocess.Popen(['python3', 'handler.py', channel.handle()], pass_fds=channel.fds)
+    write_request_to_shm(channel, request.SerializeToString())
+    response_bytes = read_response_from_shm(channel)
+
+Handler side (mirrors read_request_from_fd / write_response_to_fd):
+    channel = ShmChannel.attach(sys.argv[1])
+    request.ParseFromString(read_request_from_shm(channel))
+    write_response_to_shm(channel, response)
+"""
+
+import os
+import select
+import struct
+import time
+
+_MAGIC = 0x42594F42534D4831  # "BYOBSMH1"
+_HEADER = struct.Struct('<QQ')    # magic, ring capacity
+_RING_HEADER = struct.Struct('<QQ')  # write position, read position (monotonic)
+_LENGTH = struct.Struct('<I')
+
+
+class _Notifier:
+    """Wake-up primitive backed by an eventfd, or a pipe where eventfd is unavailable"""
+
+    def __init__(self, read_fd, write_fd):
+        self.read_fd = read_fd
+        self.write_fd = write_fd
+
+    @classmethod
+    def create(cls):
+        if hasattr(os, 'eventfd'):
+            fd = os.eventfd(0)
+            return cls(fd, fd)
+        read_fd, write_fd = os.pipe()
+        os.set_blocking(read_fd, False)
+        os.set_blocking(write_fd, False)
+        return cls(read_fd, write_fd)
+
+    @property
+    def fds(self):
+        return (self.read_fd,) if self.read_fd == self.write_fd else (self.read_fd, self.write_fd)
+
+    def signal(self):
+        if self.read_fd == self.write_fd:
+            os.eventfd_write(self.write_fd, 1)
+            return
+        try:
+            os.write(self.write_fd, b'\0')
+        except BlockingIOError:
+            # Pipe already full: a wake-up is pending anyway
+            pass
+
+    def wait(self, timeout=None):
+        """Block until signalled; returns False on timeout"""
+        eventfd = self.read_fd == self.write_fd
+        if timeout is not None or not eventfd:
+            ready, _, _ = select.select([self.read_fd], [], [], timeout)
+            if not ready:
+                return False
+        try:
+            # eventfd reads return and reset the counter; pipes are drained
+            os.read(self.read_fd, 8 if eventfd else 4096)
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self):
+        for fd in set(self.fds):
+            os.close(fd)
+
+
+class _Ring:
+    """SPSC byte ring inside a shared buffer"""
+
+    def __init__(self, buf, offset, capacity, data_ready, space_ready):
+        self._buf = buf
+        self._offset = offset
+        self._data = offset + _RING_HEADER.size
+        self.capacity = capacity
+        self.data_ready = data_ready
+        self.space_ready = space_ready
+
+    def _positions(self):
+        return _RING_HEADER.unpack_from(self._buf, self._offset)
+
+    def _copy_in(self, pos, data):
+        start = pos % self.capacity
+        first = min(len(data), self.capacity - start)
+        self._buf[self._data + start:self._data + start + first] = data[:first]
+        if first < len(data):
+            self._buf[self._data:self._data + len(data) - first] = data[first:]
+
+    def _copy_out(self, pos, length):
+        start = pos % self.capacity
+        first = min(length, self.capacity - start)
+        if first == length:
+            return bytearray(self._buf[self._data + start:self._data + start + length])
+        out = bytearray(self._buf[self._data + start:self._data + start + first])
+        out += self._buf[self._data:self._data + length - first]
+        return out
+
+    def _wait(self, notifier, deadline):
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        if not notifier.wait(timeout):
+            raise TimeoutError("Timed out waiting on shared-memory ring")
+
+    def send(self, payload, timeout=None):
+        payload = memoryview(payload).cast('B')
+        need = _LENGTH.size + len(payload)
+        if need > self.capacity:
+            raise ValueError(f"Message of {len(payload)} bytes exceeds ring capacity {self.capacity}")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            write_pos, read_pos = self._positions()
+            if self.capacity - (write_pos - read_pos) >= need:
+                break
+            self._wait(self.space_ready, deadline)
+        self._copy_in(write_pos, _LENGTH.pack(len(payload)))
+        self._copy_in(write_pos + _LENGTH.size, payload)
+        # Publish only after the payload is in place
+        struct.pack_into('<Q', self._buf, self._offset, write_pos + need)
+        self.data_ready.signal()
+
+    def recv(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            write_pos, read_pos = self._positions()
+            if write_pos != read_pos:
+                break
+            self._wait(self.data_ready, deadline)
+        length = _LENGTH.unpack(self._copy_out(read_pos, _LENGTH.size))[0]
+        payload = self._copy_out(read_pos + _LENGTH.size, length)
+        struct.pack_into('<Q', self._buf, self._offset + 8, read_pos + _LENGTH.size + length)
+        self.space_ready.signal()
+        return payload
+
+
+def _attach_segment(name):
+    # Imported on first use, so handlers that only import serdes_utils do not
+    # pay for multiprocessing
+    from multiprocessing import shared_memory
+
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: stop the resource tracker from unlinking a segment we do not own
+        from multiprocessing import resource_tracker
+
+        segment = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(segment._name, 'shared_memory')
+        return segment
+
+
+class ShmChannel:
+    """Request and response rings in one shared-memory segment"""
+
+    def __init__(self, segment, capacity, notifiers, owner):
+        self.segment = segment
+        self.capacity = capacity
+        self._notifiers = notifiers
+        self._owner = owner
+        ring_size = _RING_HEADER.size + capacity
+        req_data, req_space, resp_data, resp_space = notifiers
+        self.requests = _Ring(segment.buf, _HEADER.size, capacity, req_data, req_space)
+        self.responses = _Ring(segment.buf, _HEADER.size + ring_size, capacity, resp_data, resp_space)
+
+    @classmethod
+    def create(cls, capacity=16 * 1024 * 1024):
+        """Create a channel whose rings each hold `capacity` bytes"""
+        from multiprocessing import shared_memory
+
+        size = _HEADER.size + 2 * (_RING_HEADER.size + capacity)
+        segment = shared_memory.SharedMemory(create=True, size=size)
+        _HEADER.pack_into(segment.buf, 0, _MAGIC, capacity)
+        _RING_HEADER.pack_into(segment.buf, _HEADER.size, 0, 0)
+        _RING_HEADER.pack_into(segment.buf, _HEADER.size + _RING_HEADER.size + capacity, 0, 0)
+        notifiers = [_Notifier.create() for _ in range(4)]
+        return cls(segment, capacity, notifiers, owner=True)
+
+    @property
+    def fds(self):
+        """Notifier fds a child process must inherit (e.g. via pass_fds)"""
+        return tuple(fd for notifier in self._notifiers for fd in notifier.fds)
+
+    def handle(self):
+        """String a child passes to attach(): segment name and notifier fds"""
+        fds = ','.join(f'{n.read_fd}/{n.write_fd}' for n in self._notifiers)
+        return f'{self.segment.name}:{fds}'
+
+    @classmethod
+    def attach(cls, handle):
+        name, fds = handle.split(':')
+        notifiers = [_Notifier(*(int(fd) for fd in pair.split('/'))) for pair in fds.split(',')]
+        segment = _attach_segment(name)
+        magic, capacity = _HEADER.unpack_from(segment.buf, 0)
+        if magic != _MAGIC:
+            segment.close()
+            raise ValueError(f"Shared memory segment {name} is not a BYOB channel")
+        return cls(segment, capacity, notifiers, owner=False)
+
+    def close(self):
+        self.requests = self.responses = None
+        for notifier in self._notifiers:
+            notifier.close()
+        self.segment.close()
+        if self._owner:
+            self.segment.unlink()
+
+
+"""
+Read a serialized request from a shared-memory channel.
+    Args:
+        channel (ShmChannel): Channel attached by the handler
+        timeout (float): Seconds to wait, or None to block
+    Returns:
+        bytearray: Serialized protobuf request
+"""
+def read_request_from_shm(channel, timeout=None):
+    return channel.requests.recv(timeout)
+
+
+"""
+Write a protobuf response to a shared-memory channel.
+    Args:
+        channel (ShmChannel): Channel attached by the handler
+        response: Protobuf message to write
+"""
+def write_response_to_shm(channel, response, timeout=None):
+    channel.responses.send(response.SerializeToString(), timeout)
+
+
+def write_request_to_shm(channel, request_bytes, timeout=None):
+    """Caller side: enqueue a serialized request"""
+    channel.requests.send(request_bytes, timeout)
+
+
+def read_response_from_shm(channel, timeout=None):
+    """Caller side: wait for a serialized response"""
+    return channel.responses.recv(timeout)
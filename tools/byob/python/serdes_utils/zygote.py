@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# Copyright 2024 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pre-forked zygote for one-shot BYOB handlers.
+
+The zygote imports a handler module once (protobuf, generate_bid_pb2, numpy,
+the model, ...) and then forks one child per request. Each child runs
+``handler.handle(fd, *args)`` with copy-on-write access to the warm state and
+exits, so the one-process-per-request contract is kept without paying
+interpreter startup and imports every time.
+
+A handler module provides:
+    handle(fd, *args) -> int     process one request on fd, return exit status
+    preload(*args)               optional, load warm state before forking
+
+Start the zygote:
+    python3 -m serdes_utils.zygote serve --handler credit_card_inference --socket /tmp/udf.sock
+
+Run a request (drop-in for ``python3 credit_card_inference.py 3``):
+    python3 -m serdes_utils.zygote launch --socket /tmp/udf.sock 3
+
+The launcher passes the request fd and its own stdout/stderr to the zygote
+over a Unix socket (SCM_RIGHTS), then waits for the child's exit status.
+"""
+
+import array
+import os
+import signal
+import socket
+import struct
+import sys
+
+_STATUS = struct.Struct('<i')
+_MAX_ARGS_BYTES = 64 * 1024
+
+
+"""
+Send a request fd to a running zygote and wait for the handler to finish.
+    Args:
+        socket_path (str): Zygote socket path
+        fd (int): Request/response file descriptor
+        args (list): Extra string arguments passed to handle()
+    Returns:
+        int: Exit status of the handler child
+"""
+def launch(socket_path, fd, args=()):
+    payload = b'\0'.join(arg.encode('utf-8') for arg in args)
+    fds = array.array('i', [fd, sys.stdout.fileno(), sys.stderr.fileno()])
+    sys.stdout.flush()
+    sys.stderr.flush()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.connect(socket_path)
+        conn.sendmsg([struct.pack('<I', len(payload)) + payload],
+                     [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds.tobytes())])
+        status = b''
+        while len(status) < _STATUS.size:
+            chunk = conn.recv(_STATUS.size - len(status))
+            if not chunk:
+                # Child died without reporting (e.g. killed by a signal)
+                return 1
+            status += chunk
+    return _STATUS.unpack(status)[0]
+
+
+def _recv_request(conn):
+    fds = array.array('i')
+    data, ancdata, _, _ = conn.recvmsg(4 + _MAX_ARGS_BYTES, socket.CMSG_SPACE(3 * fds.itemsize))
+    for level, kind, cmsg_data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(cmsg_data[:len(cmsg_data) - (len(cmsg_data) % fds.itemsize)])
+    if len(fds) != 3 or len(data) < 4:
+        for fd in fds:
+            os.close(fd)
+        raise ValueError("Malformed zygote request")
+    length = struct.unpack('<I', data[:4])[0]
+    payload = data[4:4 + length]
+    args = [arg.decode('utf-8') for arg in payload.split(b'\0')] if payload else []
+    return list(fds), args
+
+
+def _run_child(handler, conn, fds, args):
+    request_fd, stdout_fd, stderr_fd = fds
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.dup2(stdout_fd, 1)
+    os.dup2(stderr_fd, 2)
+    os.close(stdout_fd)
+    os.close(stderr_fd)
+    status = 1
+    try:
+        result = handler.handle(request_fd, *args)
+        status = result if isinstance(result, int) else 0
+    except SystemExit as e:
+        # Same mapping as the interpreter: None is success, a non-int is printed.
+        if e.code is None:
+            status = 0
+        elif isinstance(e.code, int):
+            status = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            status = 1
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            conn.sendall(_STATUS.pack(status))
+        finally:
+            os._exit(status & 0xFF)
+
+
+"""
+Import the handler once, then fork a child per request received on socket_path.
+    Args:
+        handler_name (str): Module exposing handle(fd, *args) and optionally preload(*args)
+        socket_path (str): Unix socket to listen on
+        preload_args (list): Arguments for handler.preload()
+"""
+def serve(handler_name, socket_path, preload_args=()):
+    import importlib
+
+    handler = importlib.import_module(handler_name)
+    if hasattr(handler, 'preload'):
+        handler.preload(*preload_args)
+
+    # Children are reaped automatically; they report status over their connection
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(128)
+    print(f"Zygote for {handler_name} listening on {socket_path}", file=sys.stderr)
+    try:
+        while True:
+            conn, _ = listener.accept()
+            try:
+                fds, args = _recv_request(conn)
+            except (OSError, ValueError) as e:
+                print(f"Zygote: dropping request: {e}", file=sys.stderr)
+                conn.close()
+                continue
+            try:
+                pid = os.fork()
+            except OSError as e:
+                # Out of processes or memory: fail this request, keep serving
+                message = f"Zygote: fork failed: {e}\n"
+                sys.stderr.write(message)
+                try:
+                    os.write(fds[2], message.encode('utf-8'))
+                    conn.sendall(_STATUS.pack(1))
+                except OSError:
+                    pass
+                pid = None
+            if pid == 0:
+                listener.close()
+                _run_child(handler, conn, fds, args)
+            for fd in fds:
+                os.close(fd)
+            conn.close()
+    finally:
+        listener.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Pre-forked zygote for BYOB python handlers')
+    sub = parser.add_subparsers(dest='command', required=True)
+    serve_parser = sub.add_parser('serve', help='Preload a handler and fork per request')
+    serve_parser.add_argument('--handler', required=True, help='Handler module, e.g. credit_card_inference')
+    serve_parser.add_argument('--socket', required=True, help='Unix socket path')
+    serve_parser.add_argument('--path', default='.', help='Directory containing the handler (default: .)')
+    serve_parser.add_argument('--preload-arg', action='append', default=[], help='Argument for preload()')
+    launch_parser = sub.add_parser('launch', help='Hand a request fd to a running zygote')
+    launch_parser.add_argument('--socket', required=True, help='Unix socket path')
+    launch_parser.add_argument('fd', type=int, help='Request/response file descriptor')
+    launch_parser.add_argument('args', nargs='*', help='Extra arguments passed to handle()')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        sys.path.insert(0, os.path.abspath(args.path))
+        serve(args.handler, args.socket, args.preload_arg)
+        return 0
+    return launch(args.socket, args.fd, args.args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Priority and deadline scheduling for secure-invoke batches.
+
+Work is ordered by ``priority`` (higher first), then earliest deadline, then
+file order. A fixed set of dispatcher threads takes the next item only when
+one of them is free, so an urgent request never waits behind work already
+handed to an executor queue. An item whose deadline has passed when it
+reaches the front is expired instead of sent.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+
+class BatchRequest(NamedTuple):
+    """One batch line: ``deadline_ms`` is relative to the start of the batch."""
+
+    id: int
+    request: Dict[str, Any]
+    priority: int = 0
+    deadline_ms: Optional[float] = None
+
+
+class DeadlineStats:
+    """Deadline outcome counters, updated by the dispatcher threads."""
+
+    def __init__(self) -> None:
+        self.with_deadline = 0
+        self.expired = 0
+        self.late = 0
+        self._lock = threading.Lock()
+
+    def count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"with_deadline": self.with_deadline, "expired": self.expired, "late": self.late}
+
+
+class BatchScheduler:
+    """Runs queued work items with ``workers`` dispatcher threads.
+
+    ``execute(item)`` runs an item; ``expire(item)`` is called instead when the
+    item's deadline (a ``time.monotonic()`` value) passed before dispatch.
+    """
+
+    def __init__(self, workers: int, thread_name_prefix: str = "batch"):
+        self.workers = max(1, workers)
+        self.thread_name_prefix = thread_name_prefix
+        self.stats = DeadlineStats()
+        self._heap: List[Tuple[int, float, int, Optional[float], Any]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def push(self, item: Any, priority: int = 0, deadline: Optional[float] = None) -> None:
+        if deadline is not None:
+            self.stats.count("with_deadline")
+        entry = (-priority, float("inf") if deadline is None else deadline, next(self._seq), deadline, item)
+        with self._lock:
+            heapq.heappush(self._heap, entry)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._heap)
+
+    def _pop(self) -> Optional[Tuple[Optional[float], Any]]:
+        with self._lock:
+            if not self._heap:
+                return None
+            entry = heapq.heappop(self._heap)
+        return entry[3], entry[4]
+
+    def _dispatch(self, execute: Callable[[Any], None], expire: Callable[[Any], None]) -> None:
+        while True:
+            entry = self._pop()
+            if entry is None:
+                return
+            deadline, item = entry
+            if deadline is not None and time.monotonic() >= deadline:
+                self.stats.count("expired")
+                expire(item)
+                continue
+            execute(item)
+            if deadline is not None and time.monotonic() > deadline:
+                self.stats.count("late")
+
+    def run(
+        self,
+        execute: Callable[[Any], None],
+        expire: Callable[[Any], None],
+        executor: Optional[Executor] = None,
+    ) -> DeadlineStats:
+        """Drain the queue; re-raises the first error from ``execute``/``expire``.
+
+        Dispatchers run on ``executor`` when given, so a long-running caller
+        keeps the same threads (and their warm clients) across runs; it needs
+        at least ``workers`` threads. Otherwise a pool is created for this run.
+        """
+        if executor is None:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.thread_name_prefix) as pool:
+                futures = [pool.submit(self._dispatch, execute, expire) for _ in range(self.workers)]
+        else:
+            futures = [executor.submit(self._dispatch, execute, expire) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+        return self.stats
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Compare a fresh client per batch line with the warm per-thread batch workers.
+
+``fresh`` builds a new client with ``_create_worker()`` for every request, as
+batch workers did before; ``warm`` reuses one client per thread through
+``_batch_worker()``, as ``batch_invoke`` does now. Both call
+``process_single_request`` with the same KMS key, fetched once. The
+configuration comes from the usual environment variables (``KMS_HOST``,
+``BUYER_HOST``, ``REQUEST_PATH``, ``INSECURE``, ...):
+
+    KMS_HOST=https://kms.example BUYER_HOST=https://ofe.example:443 \
+        REQUEST_PATH=/requests/get_bids_request.json \
+        python benchmarks/batch_workers.py --requests 2000 --concurrency 16
+
+Reports requests/s, latency percentiles and HTTP/1.1 connections opened.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from urllib3.connection import HTTPConnection  # noqa: E402
+
+import invoke  # noqa: E402
+
+_connects = 0
+_connects_lock = threading.Lock()
+
+
+def _count_connects() -> None:
+    original = HTTPConnection._new_conn
+
+    def counted(*args: Any, **kwargs: Any) -> Any:
+        global _connects
+        with _connects_lock:
+            _connects += 1
+        return original(*args, **kwargs)
+
+    HTTPConnection._new_conn = counted
+
+
+def _run(
+    worker: Callable[[], Any],
+    request_data: Dict[str, Any],
+    public_key: Dict[str, Any],
+    args: argparse.Namespace,
+) -> None:
+    global _connects
+    _connects = 0
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def call(_: int) -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            ok = worker().process_single_request(request_data, public_key) is not None
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            errors += 0 if ok else 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(call, range(args.requests)))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"  {args.requests / wall:10.1f} req/s   p50 {statistics.median(latencies) * 1000:8.2f} ms   "
+        f"p99 {p99 * 1000:8.2f} ms   connections {_connects:5d}   errors {errors}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark fresh vs warm batch worker clients")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per mode (default: 2000)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Worker threads (default: 16)")
+    args = parser.parse_args()
+
+    client = invoke._create_client()
+    public_key = invoke._prepare_client(client)
+    if not public_key:
+        print("✗ Could not fetch a public key from KMS_HOST", file=sys.stderr)
+        return 1
+    request_data = client.load_request_data()
+
+    _count_connects()
+    print(f"fresh: new client per request, {args.concurrency} threads")
+    _run(invoke._create_worker, request_data, public_key, args)
+    print(f"warm: one client per thread, {args.concurrency} threads")
+    _run(invoke._batch_worker, request_data, public_key, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Compare per-thread HTTP/1.1 sessions with the shared HTTP/2 adapter.
+
+``http1`` gives every worker thread its own ``requests`` session, as batch
+workers do today, so concurrency equals the number of connections. ``http2``
+mounts one ``Http2Adapter`` with ``--connections`` multiplexed connections on
+every thread's session. Each worker POSTs ``--payload-bytes`` of opaque data
+(ciphertext-sized) to ``--url``:
+
+    python benchmarks/http2_transport.py --url https://ofe.example:443/v1/getbids \
+        --concurrency 64 --requests 5000 --connections 4 --insecure
+
+The endpoint must speak HTTP/2 (ALPN for https, prior knowledge for http).
+Reports requests/s, latency percentiles and TCP connections opened.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+from urllib3.connection import HTTPConnection  # noqa: E402
+
+from http2_transport import Http2Adapter  # noqa: E402
+
+_connects = 0
+_connects_lock = threading.Lock()
+
+
+def _count_connects() -> None:
+    """Count TCP connects made by urllib3 (HTTP/1.1) and httpcore (HTTP/2)."""
+    import httpcore
+
+    def counted(original: Callable[..., Any]) -> Callable[..., Any]:
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            global _connects
+            with _connects_lock:
+                _connects += 1
+            return original(*args, **kwargs)
+
+        return wrapper
+
+    HTTPConnection._new_conn = counted(HTTPConnection._new_conn)
+    backend = httpcore._backends.sync.SyncBackend
+    backend.connect_tcp = counted(backend.connect_tcp)
+
+
+def _run(session_factory: Callable[[], requests.Session], args: argparse.Namespace, body: bytes) -> None:
+    global _connects
+    _connects = 0
+    local = threading.local()
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def call(_: int) -> None:
+        nonlocal errors
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = session_factory()
+        start = time.perf_counter()
+        try:
+            response = session.post(args.url, data=body, verify=not args.insecure, timeout=30)
+            ok = response.status_code < 500
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            errors += 0 if ok else 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(call, range(args.requests)))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"  {args.requests / wall:10.1f} req/s   p50 {statistics.median(latencies) * 1000:8.2f} ms   "
+        f"p99 {p99 * 1000:8.2f} ms   connections {_connects:5d}   errors {errors}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark HTTP/1.1 sessions vs the HTTP/2 adapter")
+    parser.add_argument("--url", required=True, help="HTTP/2-capable endpoint to POST to")
+    parser.add_argument("--concurrency", type=int, default=64, help="Worker threads (default: 64)")
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per mode (default: 5000)")
+    parser.add_argument("--connections", type=int, default=4, help="HTTP/2 connections (default: 4)")
+    parser.add_argument("--payload-bytes", type=int, default=4096, help="Request body size (default: 4096)")
+    parser.add_argument("--insecure", action="store_true", help="Skip TLS verification")
+    args = parser.parse_args()
+
+    _count_connects()
+    body = os.urandom(args.payload_bytes)
+    cleartext = args.url.startswith("http://")
+    adapter = Http2Adapter(connections=args.connections, verify=not args.insecure, cleartext=cleartext)
+    origin = "/".join(args.url.split("/")[:3])
+
+    def http2_session() -> requests.Session:
+        session = requests.Session()
+        session.mount(origin, adapter)
+        return session
+
+    print(f"http1: one session per thread, {args.concurrency} threads")
+    _run(requests.Session, args, body)
+    print(f"http2: shared adapter, {args.connections} connections, {args.concurrency} threads")
+    _run(http2_session, args, body)
+    adapter.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
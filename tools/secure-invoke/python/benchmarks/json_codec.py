@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Compare JSON CPU time per batch line across the available codecs.
+
+For each installed backend (orjson, msgspec, stdlib json) this decodes every
+request line, extracts the ``request`` body, and encodes a success row of the
+shape written to ``success_log``. It reports CPU microseconds per line.
+
+    python benchmarks/json_codec.py --lines 200000
+    python benchmarks/json_codec.py --input /requests/batch_requests.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_codec  # noqa: E402
+
+_SAMPLE_RESPONSE = {
+    "bids": [
+        {
+            "ad": "ad",
+            "adComponents": ["https://my-ad-component"],
+            "adCost": 2,
+            "bid": 1,
+            "bidCurrency": "USD",
+            "debugReportUrls": {
+                "auctionDebugLossUrl": "https://my-debug-url/loss",
+                "auctionDebugWinUrl": "https://my-debug-url/win",
+            },
+            "interestGroupName": "Rajini Kausalya",
+            "modelingSignals": 3,
+            "render": "https://my-render-url",
+        }
+    ],
+    "updateInterestGroupList": {},
+}
+
+
+def synthetic_lines(count: int) -> List[bytes]:
+    _, _, dumps, _ = json_codec.select("json")
+    lines = []
+    for i in range(count):
+        request = {
+            "buyerInput": {
+                "interestGroups": [
+                    {
+                        "biddingSignalsKeys": [str(9999999990 + i)],
+                        "name": f"user-{i}",
+                        "userBiddingSignals": '{"age":58, "average_amount_spent":50008000, "total_spent":100016000}',
+                    }
+                ]
+            },
+            "publisherName": "irctc.com",
+            "seller": "irctc.com",
+        }
+        lines.append(dumps({"id": i, "request": request}))
+    return lines
+
+
+def run(backend: str, lines: List[bytes]) -> None:
+    _, loads, dumps, _ = json_codec.select(backend)
+    start = time.process_time()
+    bodies = []
+    for line in lines:
+        payload = loads(line)
+        bodies.append((payload["id"], payload.get("request", payload)))
+    decode_s = time.process_time() - start
+
+    start = time.process_time()
+    for request_id, _ in bodies:
+        dumps({"id": request_id, "response": _SAMPLE_RESPONSE})
+    encode_s = time.process_time() - start
+
+    per_line = 1e6 / len(lines)
+    print(
+        f"{backend:8s} decode {decode_s * per_line:7.2f} us/line  "
+        f"encode {encode_s * per_line:7.2f} us/line  "
+        f"total {(decode_s + encode_s) * per_line:7.2f} us/line"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark JSON codecs on batch lines")
+    parser.add_argument("--input", help="JSONL batch file to use instead of synthetic lines")
+    parser.add_argument("--lines", type=int, default=100000, help="Synthetic lines to generate")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, "rb") as handle:
+            lines = [line for line in handle if line.strip()]
+    else:
+        lines = synthetic_lines(args.lines)
+    if not lines:
+        print("✗ No lines to benchmark", file=sys.stderr)
+        return 1
+
+    print(f"{len(lines)} lines, default codec: {json_codec.BACKEND}")
+    for backend in json_codec.CODECS:
+        try:
+            run(backend, lines)
+        except ValueError as exc:
+            print(f"{backend:8s} skipped ({exc})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
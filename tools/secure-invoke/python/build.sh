@@ -7,6 +7,7 @@ WHEEL_URL="${SECURE_REQUEST_WHEEL_URL:-https://github.com/saranggalada/bidding-a
 
 docker build \
   --build-arg "SECURE_REQUEST_WHEEL_URL=${WHEEL_URL}" \
+  --build-arg "INSTALL_EXTRAS=${INSTALL_EXTRAS:-true}" \
   -t "${IMAGE}" \
   "${SCRIPT_DIR}"
 
@@ -1,8 +1,16 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-export LD_LIBRARY_PATH="$(
-  python -c "import os, secure_request_client; print(os.path.join(os.path.dirname(secure_request_client.__file__), 'lib'))"
-):${LD_LIBRARY_PATH:-}"
+# The SDK's native library directory is resolved at image build time so that
+# container startup does not pay for an extra interpreter and SDK import.
+SDK_LIB_DIR_FILE=/secure_invoke/.sdk_lib_dir
+if [[ -f "${SDK_LIB_DIR_FILE}" ]]; then
+  SDK_LIB_DIR="$(cat "${SDK_LIB_DIR_FILE}")"
+else
+  SDK_LIB_DIR="$(
+    python -c "import os, secure_request_client; print(os.path.join(os.path.dirname(secure_request_client.__file__), 'lib'))"
+  )"
+fi
+export LD_LIBRARY_PATH="${SDK_LIB_DIR}:${LD_LIBRARY_PATH:-}"
 
 exec python /secure_invoke/invoke.py "$@"
@@ -0,0 +1,244 @@
+"""
+gRPC transport for the Offer Frontend client.
+
+The SDK encrypts a request and POSTs ``{"requestCiphertext": <base64>,
+"keyId": ...}`` to the frontend's REST gateway, then decrypts the
+``{"responseCiphertext": <base64>}`` reply. ``GrpcAdapter`` is a ``requests``
+transport adapter that sends the same ciphertext as a ``BuyerFrontEnd/GetBids``
+unary call instead:
+
+    message GetBidsRequest  { bytes request_ciphertext = 1; string key_id = 2; }
+    message GetBidsResponse { bytes response_ciphertext = 1; }
+
+The ciphertext travels as raw protobuf bytes (no JSON/base64 inflation), and
+the reply is handed back to the SDK in the REST shape so encryption and
+decryption are unchanged. Channels are persistent and shared by every worker,
+so concurrent calls are multiplexed as HTTP/2 streams over ``channels``
+connections with keepalive pings. Needs ``grpcio``.
+"""
+
+from __future__ import annotations
+
+import base64
+import itertools
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from requests.adapters import BaseAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import ReadTimeout
+from requests.models import PreparedRequest, Response
+from requests.structures import CaseInsensitiveDict
+
+from json_codec import dumps, loads
+
+GET_BIDS_METHOD = "/privacy_sandbox.bidding_auction_servers.BuyerFrontEnd/GetBids"
+
+# Headers that describe the HTTP/JSON request itself rather than caller metadata.
+_SKIP_HEADERS = {
+    "accept",
+    "accept-encoding",
+    "connection",
+    "content-length",
+    "content-type",
+    "host",
+    "keep-alive",
+    "te",
+    "transfer-encoding",
+    "upgrade",
+    "user-agent",
+}
+
+# gRPC status code -> HTTP status, as mapped by grpc-gateway.
+_HTTP_STATUS = {
+    1: 499,   # CANCELLED
+    2: 500,   # UNKNOWN
+    3: 400,   # INVALID_ARGUMENT
+    4: 504,   # DEADLINE_EXCEEDED
+    5: 404,   # NOT_FOUND
+    6: 409,   # ALREADY_EXISTS
+    7: 403,   # PERMISSION_DENIED
+    8: 429,   # RESOURCE_EXHAUSTED
+    9: 400,   # FAILED_PRECONDITION
+    10: 409,  # ABORTED
+    11: 400,  # OUT_OF_RANGE
+    12: 501,  # UNIMPLEMENTED
+    13: 500,  # INTERNAL
+    14: 503,  # UNAVAILABLE
+    15: 500,  # DATA_LOSS
+    16: 401,  # UNAUTHENTICATED
+}
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def encode_get_bids_request(request_ciphertext: bytes, key_id: str) -> bytes:
+    key = key_id.encode("utf-8")
+    return (
+        b"\x0a" + _varint(len(request_ciphertext)) + request_ciphertext
+        + b"\x12" + _varint(len(key)) + key
+    )
+
+
+def decode_get_bids_response(data: bytes) -> bytes:
+    """Return ``response_ciphertext`` (field 1), skipping unknown fields."""
+    pos = 0
+    ciphertext = b""
+    while pos < len(data):
+        tag, pos = _read_varint(data, pos)
+        field, wire_type = tag >> 3, tag & 0x7
+        if wire_type == 0:
+            _, pos = _read_varint(data, pos)
+        elif wire_type == 1:
+            pos += 8
+        elif wire_type == 2:
+            length, pos = _read_varint(data, pos)
+            if field == 1:
+                ciphertext = data[pos:pos + length]
+            pos += length
+        elif wire_type == 5:
+            pos += 4
+        else:
+            raise ValueError(f"Unsupported protobuf wire type {wire_type}")
+    if pos > len(data):
+        raise ValueError("Truncated GetBidsResponse")
+    return ciphertext
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("Truncated varint")
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _timeout(timeout: Any) -> Optional[float]:
+    if isinstance(timeout, tuple):
+        timeout = timeout[1]
+    return float(timeout) if timeout is not None else None
+
+
+class GrpcAdapter(BaseAdapter):
+    """``requests`` adapter that sends SDK GetBids calls over shared gRPC channels."""
+
+    def __init__(
+        self,
+        target: str,
+        channels: int = 1,
+        secure: bool = False,
+        root_certificates: Optional[bytes] = None,
+        private_key: Optional[bytes] = None,
+        certificate_chain: Optional[bytes] = None,
+        keepalive_ms: int = 30000,
+        user_agent: Optional[str] = None,
+        method: str = GET_BIDS_METHOD,
+    ):
+        super().__init__()
+        import grpc
+
+        self._grpc = grpc
+        options: List[Tuple[str, Any]] = [
+            ("grpc.max_receive_message_length", -1),
+            ("grpc.max_send_message_length", -1),
+            # Without this, channels with identical arguments share one connection.
+            ("grpc.use_local_subchannel_pool", 1),
+        ]
+        if keepalive_ms > 0:
+            options += [
+                ("grpc.keepalive_time_ms", keepalive_ms),
+                ("grpc.keepalive_timeout_ms", max(1000, keepalive_ms // 3)),
+                ("grpc.keepalive_permit_without_calls", 1),
+                ("grpc.http2.max_pings_without_data", 0),
+            ]
+        if user_agent:
+            options.append(("grpc.primary_user_agent", user_agent))
+
+        self.channels = max(1, channels)
+        self._channels = []
+        for _ in range(self.channels):
+            if secure:
+                credentials = grpc.ssl_channel_credentials(root_certificates, private_key, certificate_chain)
+                channel = grpc.secure_channel(target, credentials, options=options)
+            else:
+                channel = grpc.insecure_channel(target, options=options)
+            self._channels.append(channel.unary_unary(method))
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def _call(self) -> Any:
+        with self._lock:
+            return self._channels[next(self._next) % self.channels]
+
+    @staticmethod
+    def _metadata(request: PreparedRequest) -> List[Tuple[str, str]]:
+        return [(k.lower(), v) for k, v in request.headers.items() if k.lower() not in _SKIP_HEADERS]
+
+    @staticmethod
+    def _response(request: PreparedRequest, status: int, body: Dict[str, Any], elapsed: float) -> Response:
+        response = Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+        response.reason = "OK" if status == 200 else "gRPC error"
+        response.url = request.url or ""
+        response.request = request
+        response.encoding = "utf-8"
+        response._content = dumps(body)
+        response.elapsed = timedelta(seconds=elapsed)
+        return response
+
+    def send(
+        self,
+        request: PreparedRequest,
+        stream: bool = False,
+        timeout: Any = None,
+        verify: Any = True,
+        cert: Any = None,
+        proxies: Any = None,
+    ) -> Response:
+        try:
+            payload = loads(request.body or b"{}")
+            ciphertext = payload.get("requestCiphertext", payload.get("request_ciphertext"))
+            key_id = payload.get("keyId", payload.get("key_id", ""))
+            message = encode_get_bids_request(base64.b64decode(ciphertext), str(key_id))
+        except (ValueError, TypeError, AttributeError) as exc:
+            return self._response(request, 400, {"code": 3, "message": f"Not a GetBids request: {exc}"}, 0.0)
+
+        grpc = self._grpc
+        start = time.perf_counter()
+        try:
+            reply = self._call()(message, timeout=_timeout(timeout), metadata=self._metadata(request))
+        except grpc.RpcError as exc:
+            code = exc.code()
+            if code == grpc.StatusCode.DEADLINE_EXCEEDED:
+                raise ReadTimeout(exc.details(), request=request) from exc
+            if code == grpc.StatusCode.UNAVAILABLE:
+                raise RequestsConnectionError(exc.details(), request=request) from exc
+            status = code.value[0]
+            body = {"code": status, "message": exc.details() or code.name}
+            return self._response(request, _HTTP_STATUS.get(status, 500), body, time.perf_counter() - start)
+
+        ciphertext = decode_get_bids_response(reply)
+        body = {"responseCiphertext": base64.b64encode(ciphertext).decode("ascii")}
+        return self._response(request, 200, body, time.perf_counter() - start)
+
+    def close(self) -> None:
+        # Shared across worker sessions; channels live for the process.
+        pass
@@ -0,0 +1,203 @@
+"""
+Hedged requests for tail latency.
+
+``Hedger.run`` starts a call and, if it has not finished the current hedge
+delay after it began running, starts a second copy and returns whichever
+succeeds first. Time spent queued for a thread does not count towards the
+delay. Each
+copy goes through the SDK separately, so the hedge is encrypted independently
+of the original. The delay is the ``percentile`` of recent successful call
+latencies; until ``min_samples`` calls have completed, ``initial_delay`` is
+used instead.
+
+Hedges are paid for from a token bucket. Every call deposits ``budget``
+tokens and a hedge spends one, so hedges add at most about ``budget`` extra
+upstream load (``0.1`` = 10%), plus a ``burst`` that the bucket starts with.
+
+Originals and hedges run on separate pools of ``workers`` threads. A hedge is
+only started when a hedge thread is free, so it never waits in a queue; when
+all are busy the call is not hedged and counted as ``no_capacity``.
+
+A running SDK call cannot be interrupted from another thread. The losing copy
+is cancelled if it has not started yet; otherwise its result is discarded and
+it keeps its thread until it finishes. Pool threads are joined at interpreter
+exit, so the process does not exit until every running loser has returned.
+"""
+
+from __future__ import annotations
+
+import collections
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional
+
+from request_trace import percentile
+
+
+class HedgeStats:
+    """Hedging counters, updated by the calling threads."""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_exhausted = 0
+        self.no_capacity = 0
+        self._lock = threading.Lock()
+
+    def count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.requests if self.requests else 0.0
+
+    @property
+    def win_rate(self) -> float:
+        return self.hedge_wins / self.hedged if self.hedged else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "budget_exhausted": self.budget_exhausted,
+            "no_capacity": self.no_capacity,
+            "hedge_rate": round(self.hedge_rate, 4),
+            "win_rate": round(self.win_rate, 4),
+        }
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests} requests, {self.hedged} hedged ({self.hedge_rate:.1%}), "
+            f"{self.hedge_wins} won by the hedge ({self.win_rate:.1%}), "
+            f"{self.budget_exhausted} not hedged (budget), {self.no_capacity} not hedged (no free hedge thread)"
+        )
+
+
+class Hedger:
+    """Runs calls on ``workers`` threads, hedging slow ones."""
+
+    def __init__(
+        self,
+        workers: int,
+        percentile: float = 95.0,
+        initial_delay: float = 1.0,
+        budget: float = 0.1,
+        burst: float = 10.0,
+        min_samples: int = 20,
+        window: int = 1000,
+    ):
+        workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="primary")
+        self._hedge_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hedge")
+        # One slot per hedge thread; a hedge without a free slot is skipped, not queued.
+        self._hedge_slots = threading.BoundedSemaphore(workers)
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.budget = budget
+        self.burst = max(1.0, burst)
+        self.min_samples = max(1, min_samples)
+        self.stats = HedgeStats()
+        self._latencies: Deque[float] = collections.deque(maxlen=max(self.min_samples, window))
+        self._new_samples = 0
+        self._delay: Optional[float] = None
+        self._tokens = self.burst
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        """Seconds to wait for a call before hedging it."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            # Re-sort at most every 16 samples; the percentile moves slowly.
+            if self._delay is None or self._new_samples >= 16:
+                self._delay = percentile(sorted(self._latencies), self.percentile)
+                self._new_samples = 0
+            return self._delay
+
+    def _record(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+            self._new_samples += 1
+
+    def _deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.budget)
+
+    def _withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def _submit(
+        self,
+        call: Callable[[bool], Any],
+        succeeded: Callable[[Any], bool],
+        hedge: bool,
+        running: Optional[threading.Event] = None,
+    ) -> Future:
+        def timed() -> Any:
+            if running is not None:
+                running.set()
+            started = time.monotonic()
+            result = call(hedge)
+            if succeeded(result):
+                self._record(time.monotonic() - started)
+            return result
+
+        if not hedge:
+            return self._executor.submit(timed)
+        future = self._hedge_executor.submit(timed)
+        future.add_done_callback(lambda _: self._hedge_slots.release())
+        return future
+
+    def run(self, call: Callable[[bool], Any], succeeded: Callable[[Any], bool]) -> Any:
+        """Return the first successful result of ``call(False)`` or a hedged ``call(True)``.
+
+        If both copies fail, the original call's outcome is returned (or raised).
+        """
+        self.stats.count("requests")
+        self._deposit()
+        running = threading.Event()
+        primary = self._submit(call, succeeded, False, running)
+        # The delay runs from when the call starts, not from when it was queued.
+        running.wait()
+        done, _ = wait([primary], timeout=self.delay())
+        if done:
+            return primary.result()
+        if not self._hedge_slots.acquire(blocking=False):
+            self.stats.count("no_capacity")
+            return primary.result()
+        if not self._withdraw():
+            self._hedge_slots.release()
+            self.stats.count("budget_exhausted")
+            return primary.result()
+
+        self.stats.count("hedged")
+        hedge = self._submit(call, succeeded, True)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda f: f is hedge):
+                if future.exception() is None and succeeded(future.result()):
+                    for loser in pending:
+                        loser.cancel()
+                    if future is hedge:
+                        self.stats.count("hedge_wins")
+                    return future.result()
+        return primary.result()
+
+    def close(self) -> None:
+        """Stop accepting calls without waiting for losing copies still running.
+
+        They finish in the background and their results are dropped. Python
+        joins pool threads at exit, so a loser that is still running delays
+        process exit until its SDK call returns.
+        """
+        self._executor.shutdown(wait=False)
+        self._hedge_executor.shutdown(wait=False)
@@ -0,0 +1,141 @@
+"""
+HTTP/2 transport for the Offer Frontend client.
+
+The SDK sends requests through a ``requests`` session, which speaks HTTP/1.1
+and holds one connection per concurrent request. ``Http2Adapter`` is a
+``requests`` transport adapter that forwards those calls to a small, shared
+pool of ``httpx`` clients with HTTP/2 enabled, so many concurrent requests are
+multiplexed as streams over a few connections (and TLS handshakes).
+
+Mount it on the worker's session for the ``BUYER_HOST`` origin; the SDK keeps
+building, encrypting and decrypting requests exactly as before. Needs
+``httpx[http2]``.
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+from datetime import timedelta
+from typing import Any, List, Optional, Tuple, Union
+
+from requests.adapters import BaseAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.exceptions import ConnectTimeout, ReadTimeout
+from requests.models import PreparedRequest, Response
+from requests.structures import CaseInsensitiveDict
+
+Timeout = Union[None, float, Tuple[Optional[float], Optional[float]]]
+
+# Connection-specific headers are not allowed in HTTP/2 (RFC 9113, 8.2.2).
+_HOP_BY_HOP = {"connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade"}
+
+
+def _httpx_timeout(httpx: Any, timeout: Timeout) -> Any:
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+class Http2Adapter(BaseAdapter):
+    """``requests`` adapter backed by ``connections`` HTTP/2 ``httpx`` clients.
+
+    Requests are spread round-robin across clients, and concurrent requests
+    on a client share one connection as HTTP/2 streams. ``http://`` origins
+    use HTTP/2 with prior knowledge (h2c), ``https://`` origins negotiate it
+    with ALPN. When an ``https://`` server only offers HTTP/1.1, each client
+    may open up to ``http1_connections`` connections instead, so the fallback
+    keeps the callers' concurrency rather than queueing them on
+    ``connections`` sockets. Thread-safe, so one adapter can be mounted on
+    every worker's session.
+    """
+
+    def __init__(
+        self,
+        connections: int = 1,
+        verify: Union[bool, str] = True,
+        cert: Optional[Tuple[str, str]] = None,
+        cleartext: bool = False,
+        http1_connections: int = 1,
+    ):
+        super().__init__()
+        import httpx
+
+        self._httpx = httpx
+        self.connections = max(1, connections)
+        # An HTTP/2 connection takes every request, so the pool only grows past
+        # one connection when the server negotiated HTTP/1.1.
+        per_client = 1 if cleartext else max(1, http1_connections)
+        self._clients: List[Any] = [
+            httpx.Client(
+                http1=not cleartext,
+                http2=True,
+                verify=verify,
+                cert=cert,
+                limits=httpx.Limits(max_connections=per_client, max_keepalive_connections=per_client),
+                timeout=None,
+            )
+            for _ in range(self.connections)
+        ]
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+
+    def _client(self) -> Any:
+        with self._lock:
+            return self._clients[next(self._next) % self.connections]
+
+    def send(
+        self,
+        request: PreparedRequest,
+        stream: bool = False,
+        timeout: Timeout = None,
+        verify: Union[bool, str] = True,
+        cert: Any = None,
+        proxies: Any = None,
+    ) -> Response:
+        httpx = self._httpx
+        headers = [(k, v) for k, v in request.headers.items() if k.lower() not in _HOP_BY_HOP]
+        try:
+            for attempt in range(2):
+                try:
+                    reply = self._client().request(
+                        request.method or "GET",
+                        request.url or "",
+                        headers=headers,
+                        content=request.body,
+                        timeout=_httpx_timeout(httpx, timeout),
+                    )
+                    break
+                except (httpx.RemoteProtocolError, httpx.WriteError):
+                    # The server closed the connection (GOAWAY, e.g. max requests or
+                    # max connection age) under in-flight streams; retry once on a
+                    # fresh connection.
+                    if attempt:
+                        raise
+        except httpx.ConnectTimeout as exc:
+            raise ConnectTimeout(exc, request=request) from exc
+        except httpx.TimeoutException as exc:
+            raise ReadTimeout(exc, request=request) from exc
+        except httpx.TransportError as exc:
+            raise RequestsConnectionError(exc, request=request) from exc
+
+        response = Response()
+        response.status_code = reply.status_code
+        response.headers = CaseInsensitiveDict(reply.headers.multi_items())
+        response.reason = reply.reason_phrase
+        response.url = request.url or ""
+        response.request = request
+        response.encoding = reply.charset_encoding
+        response._content = reply.content
+        response.elapsed = timedelta(seconds=reply.elapsed.total_seconds())
+        response.connection = self
+        return response
+
+    def close(self) -> None:
+        # Shared across worker sessions; closed explicitly by the owner.
+        pass
+
+    def shutdown(self) -> None:
+        for client in self._clients:
+            client.close()
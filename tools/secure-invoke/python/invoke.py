@@ -8,13 +8,14 @@ C++ secure-invoke container (KMS_HOST, BUYER_HOST, REQUEST_PATH, etc.).
 
 from __future__ import annotations
 
-import json
 import os
 import sys
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Executor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
 
 from secure_request_client import OfferRequestClient
 from secure_request_client.cli import (
@@ -25,6 +26,18 @@ from secure_request_client.cli import (
 )
 from secure_request_client.kms_client import KMSClientError
 
+# Helper modules are imported by the operations that use them, so a one-shot
+# rest_invoke does not load batch, sharding or output-format code.
+if TYPE_CHECKING:
+    from batch_scheduler import BatchRequest, DeadlineStats
+    from hedging import Hedger
+    from load_balancer import EndpointPool
+    from request_trace import RequestTrace, TraceSink
+    from response_cache import ResponseCache
+    from result_sinks import SortedLogWriter, StreamingLogWriter
+
+    BatchLog = Union[SortedLogWriter, StreamingLogWriter]
+
 _DEFAULT_USER_AGENT = "depa-secure-invoke-python/0.1.0"
 
 
@@ -58,6 +71,17 @@ def _normalize_url(host: str, default_scheme: str) -> str:
     return f"{default_scheme}://{host}"
 
 
+def _host_list(name: str, default_scheme: str) -> List[str]:
+    """Comma-separated endpoints from ``name``, normalized to URLs."""
+    hosts = [_normalize_url(host, default_scheme) for host in os.environ.get(name, "").split(",")]
+    return [host for host in hosts if host]
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
 def _optional_path(name: str) -> Optional[str]:
     value = os.environ.get(name, "").strip()
     if not value or value.endswith("/"):
@@ -68,11 +92,24 @@ def _optional_path(name: str) -> Optional[str]:
 
 
 class DepaSecureRequestClient(SecureRequestClient):
-    """SecureRequestClient with configurable KMS list-keys path and User-Agent."""
-
-    def __init__(self, config: SecureRequestConfig, kms_keys_endpoint: str):
+    """SecureRequestClient with configurable KMS list-keys path and User-Agent.
+
+    ``kms_hosts`` and ``buyer_hosts`` list every endpoint; ``config`` points at
+    the first. KMS calls fail over between hosts and Offer Frontend calls are
+    load balanced when more than one buyer host is given.
+    """
+
+    def __init__(
+        self,
+        config: SecureRequestConfig,
+        kms_keys_endpoint: str,
+        kms_hosts: Optional[List[str]] = None,
+        buyer_hosts: Optional[List[str]] = None,
+    ):
         super().__init__(config)
         self.kms_keys_endpoint = kms_keys_endpoint
+        self.kms_hosts = kms_hosts or [config.kms_host]
+        self.buyer_hosts = buyer_hosts or [config.offer_host]
 
     def setup_kms_client(self) -> bool:
         if not super().setup_kms_client():
@@ -81,7 +118,65 @@ class DepaSecureRequestClient(SecureRequestClient):
         self.kms_client.session.headers["User-Agent"] = ua
         return True
 
+    def setup_http_client(self) -> bool:
+        if not super().setup_http_client():
+            return False
+        origin = _origin(self.config.offer_host)
+        if len(self.buyer_hosts) > 1:
+            from load_balancer import BalancingAdapter
+
+            pool = _endpoint_pool(self.buyer_hosts)
+            for session in self.http_sessions():
+                adapters = {}
+                for url in self.buyer_hosts:
+                    adapter = _buyer_adapter(self.config, url) or session.get_adapter(url)
+                    if isinstance(adapter, BalancingAdapter):
+                        adapter = adapter.adapters[url]
+                    adapters[url] = adapter
+                session.mount(origin, BalancingAdapter(pool, self.config.offer_host, adapters))
+            return True
+        adapter = _buyer_adapter(self.config, self.config.offer_host)
+        if adapter is not None:
+            for session in self.http_sessions():
+                session.mount(origin, adapter)
+        return True
+
+    def http_sessions(self) -> List[Any]:
+        """``requests`` sessions used for Offer Frontend calls (not KMS)."""
+        sessions = []
+        for name, value in vars(self).items():
+            if name == "kms_client":
+                continue
+            candidates = [value] + (list(vars(value).values()) if hasattr(value, "__dict__") else [])
+            for candidate in candidates:
+                if hasattr(candidate, "mount") and hasattr(candidate, "send") and candidate not in sessions:
+                    sessions.append(candidate)
+        return sessions
+
     def fetch_public_key(self) -> Optional[Dict[str, Any]]:
+        """Fetch the key, failing over to the next ``KMS_HOST`` on error.
+
+        Starts from the host that last answered, so later calls skip a host
+        that is known to be down.
+        """
+        global _kms_host_index
+        count = len(self.kms_hosts)
+        start = _kms_host_index % count
+        for offset in range(count):
+            index = (start + offset) % count
+            host = self.kms_hosts[index]
+            if host != self.config.kms_host:
+                print(f"Trying KMS host {host}", file=sys.stderr)
+                self.config.kms_host = host
+                if not self.setup_kms_client():
+                    continue
+            key = self._fetch_public_key()
+            if key:
+                _kms_host_index = index
+                return key
+        return None
+
+    def _fetch_public_key(self) -> Optional[Dict[str, Any]]:
         try:
             self.log("Fetching public key from KMS...")
             keys = self.kms_client.list_public_keys(endpoint=self.kms_keys_endpoint)
@@ -101,21 +196,133 @@ class DepaSecureRequestClient(SecureRequestClient):
             return None
 
 
+BUYER_PROTOCOLS = ("rest", "grpc")
+
+_kms_host_index = 0
+_adapter_lock = threading.Lock()
+_adapters: Dict[Tuple[str, str], Any] = {}
+_endpoint_pools: Dict[Tuple[str, ...], EndpointPool] = {}
+
+
+def _read_optional(path: Optional[str]) -> Optional[bytes]:
+    if not path:
+        return None
+    with open(path, "rb") as handle:
+        return handle.read()
+
+
+def _buyer_protocol() -> str:
+    protocol = os.environ.get("BUYER_PROTOCOL", "rest").strip().lower() or "rest"
+    if protocol not in BUYER_PROTOCOLS:
+        raise ValueError(f"Unsupported BUYER_PROTOCOL '{protocol}'. Supported: {', '.join(BUYER_PROTOCOLS)}")
+    return protocol
+
+
+def _lb_policy() -> str:
+    from load_balancer import LB_POLICIES
+
+    policy = os.environ.get("LB_POLICY", "p2c").strip().lower() or "p2c"
+    if policy not in LB_POLICIES:
+        raise ValueError(f"Unsupported LB_POLICY '{policy}'. Supported: {', '.join(LB_POLICIES)}")
+    return policy
+
+
+def _endpoint_pool(urls: List[str]) -> EndpointPool:
+    """Process-wide ``EndpointPool`` for ``urls``, shared by every worker."""
+    from load_balancer import EndpointPool
+
+    with _adapter_lock:
+        pool = _endpoint_pools.get(tuple(urls))
+        if pool is None:
+            pool = _endpoint_pools[tuple(urls)] = EndpointPool(
+                urls,
+                policy=_lb_policy(),
+                eject_failures=_env_int("LB_EJECT_FAILURES", 3),
+                eject_seconds=_env_float("LB_EJECT_SECONDS", 10.0),
+                slow_factor=_env_float("LB_SLOW_FACTOR", 3.0),
+            )
+        return pool
+
+
+def _endpoint_stats() -> Optional[List[Dict[str, Any]]]:
+    with _adapter_lock:
+        pools = list(_endpoint_pools.values())
+    if not pools:
+        return None
+    return [stats for pool in pools for stats in pool.stats()]
+
+
+def _buyer_adapter(config: SecureRequestConfig, url: str) -> Optional[Any]:
+    """Shared transport adapter for calls to ``url``, or None for plain HTTP/1.1.
+
+    ``BUYER_PROTOCOL=grpc`` sends GetBids over persistent gRPC channels;
+    otherwise ``HTTP2=true`` multiplexes REST calls over HTTP/2.
+    """
+    protocol = _buyer_protocol()
+    if protocol == "rest" and not _env_bool("HTTP2", False):
+        return None
+    origin = _origin(url)
+    with _adapter_lock:
+        adapter = _adapters.get((protocol, origin))
+        if adapter is not None:
+            return adapter
+        # Imported here so plain HTTP/1.1 runs do not load httpx or grpc.
+        if protocol == "grpc":
+            from grpc_transport import GrpcAdapter
+
+            with_client_cert = config.client_cert and config.client_key
+            adapter = GrpcAdapter(
+                urlsplit(url).netloc,
+                channels=max(1, _env_int("GRPC_CHANNELS", 1)),
+                secure=origin.startswith("https://"),
+                root_certificates=_read_optional(config.ca_cert),
+                private_key=_read_optional(config.client_key) if with_client_cert else None,
+                certificate_chain=_read_optional(config.client_cert) if with_client_cert else None,
+                keepalive_ms=_env_int("GRPC_KEEPALIVE_MS", 30000),
+                user_agent=os.environ.get("SECURE_REQUEST_USER_AGENT", _DEFAULT_USER_AGENT),
+            )
+        else:
+            from http2_transport import Http2Adapter
+
+            verify: Any = False if config.insecure else (config.ca_cert or True)
+            cert = (config.client_cert, config.client_key) if config.client_cert and config.client_key else None
+            connections = max(1, _env_int("HTTP2_CONNECTIONS", 4))
+            adapter = Http2Adapter(
+                connections=connections,
+                verify=verify,
+                cert=cert,
+                cleartext=origin.startswith("http://"),
+                http1_connections=-(-_concurrency() // connections),
+            )
+        _adapters[(protocol, origin)] = adapter
+        return adapter
+
+
+def _concurrency() -> int:
+    """Requests the current operation may have in flight at once."""
+    if os.environ.get("OPERATION", "rest_invoke").strip().lower() == "serve":
+        return max(1, _env_int("SERVE_WORKERS", 8))
+    return max(1, _env_int("MAX_CONCURRENT_REQUESTS", 2))
+
+
 def build_config() -> Tuple[SecureRequestConfig, str]:
-    kms_host = os.environ.get("KMS_HOST", "").strip()
-    buyer_host = os.environ.get("BUYER_HOST", "").strip()
+    kms_hosts = _host_list("KMS_HOST", "https")
+    buyer_hosts = _host_list("BUYER_HOST", "http")
     request_path = os.environ.get("REQUEST_PATH", "/requests/get_bids_request.json").strip()
 
-    if not kms_host:
+    if not kms_hosts:
         raise ValueError("KMS_HOST is required")
-    if not buyer_host:
+    if not buyer_hosts:
         raise ValueError("BUYER_HOST is required")
     if not request_path:
         raise ValueError("REQUEST_PATH is required")
+    _buyer_protocol()
+    if len(buyer_hosts) > 1:
+        _lb_policy()
 
     config = SecureRequestConfig()
-    config.kms_host = _normalize_url(kms_host, "https")
-    config.offer_host = _normalize_url(buyer_host, "http")
+    config.kms_host = kms_hosts[0]
+    config.offer_host = buyer_hosts[0]
     config.request_payload = request_path
     config.retries = 1
     config.insecure = _env_bool("INSECURE", False)
@@ -134,7 +341,12 @@ def build_config() -> Tuple[SecureRequestConfig, str]:
 
 def _create_client() -> DepaSecureRequestClient:
     config, kms_keys_endpoint = build_config()
-    return DepaSecureRequestClient(config, kms_keys_endpoint)
+    return DepaSecureRequestClient(
+        config,
+        kms_keys_endpoint,
+        kms_hosts=_host_list("KMS_HOST", "https"),
+        buyer_hosts=_host_list("BUYER_HOST", "http"),
+    )
 
 
 def _prepare_client(client: DepaSecureRequestClient) -> Optional[Dict[str, Any]]:
@@ -149,26 +361,89 @@ def _prepare_client(client: DepaSecureRequestClient) -> Optional[Dict[str, Any]]
     return public_key
 
 
+def _create_worker() -> DepaSecureRequestClient:
+    """Create a client ready for ``process_single_request``.
+
+    Raises RuntimeError when the configuration, KMS client or HTTP client
+    cannot be set up.
+    """
+    worker = _create_client()
+    if not worker.config.validate():
+        raise RuntimeError("Invalid configuration")
+    if not worker.setup_kms_client():
+        raise RuntimeError("Failed to setup KMS client")
+    if not worker.setup_http_client():
+        raise RuntimeError("Failed to setup HTTP client")
+    return worker
+
+
+def _create_hedger(workers: int) -> Optional[Hedger]:
+    if not _env_bool("HEDGE", False):
+        return None
+    from hedging import Hedger
+
+    hedge_percentile = _env_float("HEDGE_PERCENTILE", 95.0)
+    if not 0 < hedge_percentile <= 100:
+        raise ValueError("HEDGE_PERCENTILE must be in (0, 100]")
+    return Hedger(
+        workers,
+        percentile=hedge_percentile,
+        initial_delay=max(0.0, _env_float("HEDGE_DELAY_MS", 1000.0)) / 1000.0,
+        budget=max(0.0, _env_float("HEDGE_BUDGET", 0.1)),
+    )
+
+
+def _run_hedged(client: DepaSecureRequestClient, hedger: Hedger) -> bool:
+    """One ``rest_invoke`` run with the upstream call hedged; prints the response JSON."""
+    public_key = _prepare_client(client)
+    if not public_key:
+        return False
+    request_data = client.load_request_data()
+    if request_data is None:
+        return False
+
+    def call(hedge: bool) -> Optional[Dict[str, Any]]:
+        try:
+            return _create_worker().process_single_request(request_data, public_key)
+        except Exception as exc:
+            print(f"✗ {'Hedged request' if hedge else 'Request'} failed: {exc}", file=sys.stderr)
+            return None
+
+    result = hedger.run(call, lambda response: response is not None)
+    if result is None:
+        return False
+    import json_codec
+
+    print(json_codec.dumps(result).decode("utf-8"))
+    return True
+
+
 def run_rest_invoke() -> int:
     run_retries = max(1, _env_int("RUN_RETRIES", 1))
     run_retry_delay = _env_float("RUN_RETRY_DELAY", 5.0)
+    hedger = _create_hedger(1)
 
-    for attempt in range(1, run_retries + 1):
-        client = _create_client()
-        if client.run():
-            if attempt > 1:
-                print(f"Succeeded on run attempt {attempt}/{run_retries}", file=sys.stderr)
-            return 0
-
-        if attempt < run_retries:
-            print(
-                f"Run failed (attempt {attempt}/{run_retries}), "
-                f"retrying in {run_retry_delay:g}s...",
-                file=sys.stderr,
-            )
-            time.sleep(run_retry_delay)
+    try:
+        for attempt in range(1, run_retries + 1):
+            client = _create_client()
+            if _run_hedged(client, hedger) if hedger is not None else client.run():
+                if attempt > 1:
+                    print(f"Succeeded on run attempt {attempt}/{run_retries}", file=sys.stderr)
+                return 0
+
+            if attempt < run_retries:
+                print(
+                    f"Run failed (attempt {attempt}/{run_retries}), "
+                    f"retrying in {run_retry_delay:g}s...",
+                    file=sys.stderr,
+                )
+                time.sleep(run_retry_delay)
 
-    return 1
+        return 1
+    finally:
+        if hedger is not None:
+            print(f"Hedging: {hedger.stats.summary()}", file=sys.stderr)
+            hedger.close()
 
 
 def run_encrypt() -> int:
@@ -199,51 +474,296 @@ def run_encrypt() -> int:
     return 0
 
 
-def _load_batch_requests(path: Path) -> List[Tuple[int, Dict[str, Any]]]:
-    requests: List[Tuple[int, Dict[str, Any]]] = []
-    with path.open("r", encoding="utf-8") as handle:
-        for line_no, line in enumerate(handle, start=1):
-            line = line.strip()
-            if not line:
-                continue
-            payload = json.loads(line)
-            if not isinstance(payload, dict):
-                raise ValueError(f"Line {line_no}: expected a JSON object")
-            request_id = payload.get("id")
-            if request_id is None:
-                raise ValueError(f"Line {line_no}: missing required 'id' field")
-            request_body = payload.get("request", payload)
-            requests.append((int(request_id), request_body))
+def _load_batch_requests(
+    path: Path,
+    shard_index: int = 0,
+    shard_count: int = 1,
+    shard_mode: str = "range",
+) -> List[BatchRequest]:
+    import json_codec
+    from batch_scheduler import BatchRequest
+    from sharding import iter_shard_lines
+
+    requests: List[BatchRequest] = []
+    for location, line in iter_shard_lines(path, shard_index, shard_count, shard_mode):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            payload = json_codec.loads(line)
+        except ValueError as exc:
+            raise ValueError(f"{location}: {exc}") from exc
+        if not isinstance(payload, dict):
+            raise ValueError(f"{location}: expected a JSON object")
+        request_id = payload.get("id")
+        if request_id is None:
+            raise ValueError(f"{location}: missing required 'id' field")
+        request_body = payload.get("request", payload)
+        try:
+            priority = int(payload.get("priority") or 0)
+            deadline_ms = payload.get("deadline_ms")
+            if deadline_ms is not None:
+                deadline_ms = float(deadline_ms)
+                if deadline_ms < 0:
+                    raise ValueError("'deadline_ms' must not be negative")
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"{location}: invalid priority or deadline_ms: {exc}") from exc
+        requests.append(BatchRequest(int(request_id), request_body, priority, deadline_ms))
     return requests
 
 
+_batch_workers = threading.local()
+
+
+def _batch_worker() -> DepaSecureRequestClient:
+    """Warm client for the calling batch thread, created on first use.
+
+    Reusing it keeps the KMS and HTTP clients (and their pooled connections)
+    across requests instead of rebuilding them per item.
+    """
+    worker = getattr(_batch_workers, "worker", None)
+    if worker is None:
+        worker = _batch_workers.worker = _create_worker()
+    return worker
+
+
 def _process_batch_item(
     public_key: Dict[str, Any],
     request_id: int,
     request_data: Dict[str, Any],
+    trace: Optional[RequestTrace] = None,
+    trace_sink: Optional[TraceSink] = None,
 ) -> Tuple[int, Optional[Dict[str, Any]], Optional[str]]:
+    if trace is not None:
+        trace.start()
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
     try:
-        worker = _create_client()
-        if not worker.config.validate():
-            return request_id, None, "Invalid configuration"
-        if not worker.setup_kms_client():
-            return request_id, None, "Failed to setup KMS client"
-        if not worker.setup_http_client():
-            return request_id, None, "Failed to setup HTTP client"
+        worker = _batch_worker()
+        if trace is not None:
+            from request_trace import instrument
 
+            trace.worker_ready(instrument(worker.http_sessions()))
         result = worker.process_single_request(request_data, public_key)
         if result is None:
-            return request_id, None, "Request processing failed"
-        return request_id, result, None
+            error = "Request processing failed"
     except Exception as exc:
-        return request_id, None, str(exc)
+        # Drop the client so the next request on this thread starts clean.
+        _batch_workers.worker = None
+        error = str(exc)
+    finally:
+        if trace is not None:
+            row = trace.finish(result, error)
+            if trace_sink is not None:
+                trace_sink.write(row)
+    return request_id, result, error
+
+
+def _create_response_cache(client: DepaSecureRequestClient) -> Optional[ResponseCache]:
+    if not _env_bool("BATCH_DEDUP", False):
+        return None
+    from response_cache import ResponseCache
+
+    # Responses are only shared between requests sent to the same place the same way.
+    scope = {
+        "buyer_hosts": client.buyer_hosts,
+        "protocol": _buyer_protocol(),
+        "headers": client.config.headers or {},
+    }
+    cache = ResponseCache(
+        max_entries=_env_int("BATCH_CACHE_SIZE", 10000),
+        ttl=_env_float("BATCH_CACHE_TTL", 3600.0),
+        scope=scope,
+    )
+    cache_path = os.environ.get("BATCH_CACHE_PATH", "").strip()
+    if cache_path:
+        try:
+            loaded = cache.load(Path(cache_path))
+        except OSError as exc:
+            print(f"Warning: could not load response cache {cache_path}: {exc}", file=sys.stderr)
+        else:
+            if loaded:
+                print(f"Loaded {loaded} cached responses from {cache_path}")
+    return cache
+
+
+def _save_response_cache(cache: ResponseCache) -> None:
+    cache_path = os.environ.get("BATCH_CACHE_PATH", "").strip()
+    if not cache_path:
+        return
+    try:
+        cache.save(Path(cache_path))
+    except OSError as exc:
+        print(f"Warning: could not save response cache {cache_path}: {exc}", file=sys.stderr)
+
+
+def _create_trace_sink(shard_index: int, shard_count: int) -> Optional[TraceSink]:
+    trace_path = os.environ.get("TRACE_PATH", "").strip()
+    if not trace_path:
+        return None
+    from request_trace import TraceSink, install_connect_probe
+    from sharding import shard_stem
+
+    path = Path(trace_path)
+    path = path.with_name(shard_stem(path.stem, shard_index, shard_count) + path.suffix)
+    install_connect_probe()
+    return TraceSink(path)
+
+
+def _execute_batch(
+    public_key: Dict[str, Any],
+    batch_requests: List[BatchRequest],
+    max_workers: int,
+    success_log: BatchLog,
+    failure_log: BatchLog,
+    cache: Optional[ResponseCache] = None,
+    trace_sink: Optional[TraceSink] = None,
+    hedger: Optional[Hedger] = None,
+    executor: Optional[Executor] = None,
+) -> DeadlineStats:
+    """Run a batch, writing each result to ``success_log`` or ``failure_log`` as it completes."""
+    from batch_scheduler import BatchScheduler
+    from request_trace import RequestTrace
+
+    lock = threading.Lock()
+    traced_ids = set()
+    started = time.monotonic()
+    scheduler = BatchScheduler(max_workers)
+
+    def new_trace(request_id: int, request_data: Dict[str, Any]) -> Optional[RequestTrace]:
+        if trace_sink is None:
+            return None
+        traced_ids.add(request_id)
+        return RequestTrace(request_id, request_data)
+
+    def deadline(deadline_ms: Optional[float]) -> Optional[float]:
+        return None if deadline_ms is None else started + deadline_ms / 1000.0
+
+    def record(
+        request_ids: List[int],
+        response: Optional[Dict[str, Any]],
+        error: Optional[str],
+        reason: str = "request_failed",
+    ) -> None:
+        with lock:
+            for request_id in request_ids:
+                if error:
+                    failure_log.write({"id": request_id, "error": {"message": error, "reason": reason}})
+                else:
+                    success_log.write({"id": request_id, "response": response})
+        if trace_sink is not None and cache is not None:
+            # The first id owns the upstream call (traced by the worker); the rest shared it.
+            traced = request_ids[0] in traced_ids
+            status = "ok" if not error else ("deadline_exceeded" if reason == "deadline_exceeded" else "error")
+            for request_id in request_ids[1:] if traced else request_ids:
+                trace_sink.write({
+                    "type": "request",
+                    "id": request_id,
+                    "status": status,
+                    "cache": "shared" if traced else "hit",
+                })
+
+    # Work item: (cache key or None, request body, ids that receive the response, trace).
+    if cache is None:
+        for item in batch_requests:
+            work = (None, item.request, [item.id], new_trace(item.id, item.request))
+            scheduler.push(work, item.priority, deadline(item.deadline_ms))
+    else:
+        # Identical bodies are sent once; every id sharing the body gets the response.
+        # A shared body runs at its highest priority and expires only once every
+        # id's deadline has passed.
+        groups: Dict[str, Tuple[Dict[str, Any], List[int], List[int], List[Optional[float]]]] = {}
+        for item in batch_requests:
+            group = groups.setdefault(cache.key(item.request), (item.request, [], [], []))
+            group[1].append(item.id)
+            group[2].append(item.priority)
+            group[3].append(item.deadline_ms)
+        for key, (request_data, request_ids, priorities, deadlines) in groups.items():
+            cached = cache.get(key)
+            if cached is not None:
+                record(request_ids, cached, None)
+                continue
+            trace = new_trace(request_ids[0], request_data)
+            if trace is not None:
+                trace.row["cache"] = "miss"
+            latest = None if None in deadlines else max(d for d in deadlines if d is not None)
+            scheduler.push((key, request_data, request_ids, trace), max(priorities), deadline(latest))
+
+    def send(
+        request_id: int, request_data: Dict[str, Any], trace: Optional[RequestTrace]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        if hedger is None:
+            return _process_batch_item(public_key, request_id, request_data, trace, trace_sink)[1:]
+        # Only the original call is traced; the hedge copy runs untraced.
+        return hedger.run(
+            lambda hedge: _process_batch_item(
+                public_key, request_id, request_data, None if hedge else trace, trace_sink
+            )[1:],
+            lambda outcome: outcome[1] is None,
+        )
+
+    def execute(work: Tuple[Optional[str], Dict[str, Any], List[int], Optional[RequestTrace]]) -> None:
+        key, request_data, request_ids, trace = work
+        if key is None:
+            response, error = send(request_ids[0], request_data, trace)
+        else:
+            response, error = cache.get_or_compute(key, lambda: send(request_ids[0], request_data, trace))
+        record(request_ids, response, error)
+
+    def expire(work: Tuple[Optional[str], Dict[str, Any], List[int], Optional[RequestTrace]]) -> None:
+        _, _, request_ids, trace = work
+        if trace is not None:
+            trace_sink.write(trace.expire())
+        record(request_ids, None, "Deadline exceeded before the request was sent", "deadline_exceeded")
+
+    return scheduler.run(execute, expire, executor)
+
+
+def _output_order(shard_count: int = 1) -> str:
+    order = os.environ.get("OUTPUT_ORDER", "id").strip().lower() or "id"
+    if order not in ("id", "completion"):
+        raise ValueError(f"Unsupported OUTPUT_ORDER '{order}'. Supported: id, completion")
+    if order == "completion" and shard_count > 1:
+        raise ValueError("OUTPUT_ORDER=completion cannot be used with SHARD_COUNT > 1; shard logs are merged by id")
+    return order
+
+
+def _open_batch_logs(
+    output_dir: Path,
+    output_format: str,
+    output_fields: Any,
+    row_group_size: int,
+    shard_index: int = 0,
+    shard_count: int = 1,
+    output_order: str = "id",
+) -> Tuple[BatchLog, BatchLog]:
+    from result_sinks import SortedLogWriter, StreamingLogWriter
+    from sharding import shard_stem
+
+    success_stem = shard_stem("success_log", shard_index, shard_count)
+    failure_stem = shard_stem("failure_log", shard_index, shard_count)
+    if output_order == "completion":
+        return (
+            StreamingLogWriter(output_dir, success_stem, output_format, output_fields, row_group_size),
+            StreamingLogWriter(output_dir, failure_stem, output_format, None, row_group_size),
+        )
+    run_size = max(row_group_size, _env_int("OUTPUT_SORT_BUFFER", 100000))
+    return (
+        SortedLogWriter(output_dir, success_stem, output_format, output_fields, row_group_size, run_size),
+        SortedLogWriter(output_dir, failure_stem, output_format, None, row_group_size, run_size),
+    )
 
 
 def run_batch_invoke() -> int:
+    from result_sinks import parse_fields, resolve_format
+    from sharding import validate_shard
+
+    started = time.perf_counter()
     bootstrap = _create_client()
     public_key = _prepare_client(bootstrap)
     if not public_key:
         return 1
+    kms_ms = round((time.perf_counter() - started) * 1000.0, 3)
 
     client = bootstrap
 
@@ -252,63 +772,241 @@ def run_batch_invoke() -> int:
         print(f"✗ Error: Request file not found: {request_path}", file=sys.stderr)
         return 1
 
+    shard_index = _env_int("SHARD_INDEX", 0)
+    shard_count = _env_int("SHARD_COUNT", 1)
+    shard_mode = os.environ.get("SHARD_MODE", "range").strip().lower() or "range"
+    validate_shard(shard_index, shard_count, shard_mode)
+
     try:
-        batch_requests = _load_batch_requests(request_path)
-    except (OSError, json.JSONDecodeError, ValueError) as exc:
+        batch_requests = _load_batch_requests(request_path, shard_index, shard_count, shard_mode)
+    except (OSError, ValueError) as exc:
         print(f"✗ Error loading batch file: {exc}", file=sys.stderr)
         return 1
 
     if not batch_requests:
-        print("✗ Error: Batch file is empty", file=sys.stderr)
-        return 1
+        if shard_count > 1:
+            print(f"Shard {shard_index}/{shard_count} has no requests")
+        else:
+            print("✗ Error: Batch file is empty", file=sys.stderr)
+            return 1
 
+    output_format = resolve_format(os.environ.get("OUTPUT_FORMAT", "jsonl"))
+    output_fields = parse_fields(os.environ.get("OUTPUT_FIELDS", ""))
+    output_order = _output_order(shard_count)
+    row_group_size = max(1, _env_int("OUTPUT_ROW_GROUP_SIZE", 10000))
     max_workers = max(1, _env_int("MAX_CONCURRENT_REQUESTS", 2))
-    successes: List[Dict[str, Any]] = []
-    failures: List[Dict[str, Any]] = []
-
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {
-            executor.submit(_process_batch_item, public_key, request_id, request_data): request_id
-            for request_id, request_data in batch_requests
-        }
-        for future in as_completed(futures):
-            request_id, response, error = future.result()
-            if error:
-                failures.append({"id": request_id, "error": {"message": error}})
-            else:
-                successes.append({"id": request_id, "response": response})
-
-    output_dir = request_path.parent
-    success_path = output_dir / "success_log.jsonl"
-    failure_path = output_dir / "failure_log.jsonl"
-
-    with success_path.open("w", encoding="utf-8") as handle:
-        for item in sorted(successes, key=lambda row: row["id"]):
-            handle.write(json.dumps(item) + "\n")
-
-    with failure_path.open("w", encoding="utf-8") as handle:
-        for item in sorted(failures, key=lambda row: row["id"]):
-            handle.write(json.dumps(item) + "\n")
-
-    print(f"Batch complete: {len(successes)} succeeded, {len(failures)} failed")
+    cache = _create_response_cache(client)
+    trace_sink = _create_trace_sink(shard_index, shard_count)
+    hedger = _create_hedger(max_workers)
+    deadlines: Optional[DeadlineStats] = None
+    success_log, failure_log = _open_batch_logs(
+        request_path.parent, output_format, output_fields, row_group_size, shard_index, shard_count, output_order
+    )
+    try:
+        deadlines = _execute_batch(
+            public_key, batch_requests, max_workers, success_log, failure_log, cache, trace_sink, hedger
+        )
+    finally:
+        if hedger is not None:
+            hedger.close()
+        if trace_sink is not None:
+            trace_sink.write({
+                "type": "batch",
+                "kms_ms": kms_ms,
+                "wall_ms": round((time.perf_counter() - started) * 1000.0, 3),
+                "workers": max_workers,
+                "requests": len(batch_requests),
+                "deadlines": deadlines.as_dict() if deadlines is not None else None,
+                "endpoints": _endpoint_stats(),
+                "hedging": hedger.stats.as_dict() if hedger is not None else None,
+            })
+            trace_sink.close()
+        # Results finished before an error are still written.
+        success_path = success_log.close()
+        failure_path = failure_log.close()
+    if cache is not None:
+        _save_response_cache(cache)
+
+    print(f"Batch complete: {success_log.count} succeeded, {failure_log.count} failed")
     print(f"  Success log: {success_path}")
     print(f"  Failure log: {failure_path}")
-    return 0 if not failures else 1
+    if deadlines.with_deadline:
+        print(
+            f"  Deadlines: {deadlines.with_deadline} requests with deadline_ms, "
+            f"{deadlines.expired} expired before send, {deadlines.late} completed after the deadline"
+        )
+    if hedger is not None:
+        print(f"  Hedging: {hedger.stats.summary()}")
+    for endpoint in _endpoint_stats() or []:
+        print(
+            f"  Endpoint {endpoint['url']}: {endpoint['requests']} calls, "
+            f"{endpoint['failures']} failures, {endpoint['ejections']} ejections"
+        )
+    if trace_sink is not None:
+        print(f"  Request trace: {trace_sink.path}")
+    if cache is not None:
+        print(
+            f"  Response cache: {len(batch_requests)} requests, "
+            f"{cache.hits} cache hits, {cache.misses} upstream calls"
+        )
+    return 0 if not failure_log.count else 1
+
+
+def run_merge_shards() -> int:
+    from result_sinks import resolve_format
+    from sharding import merge_batch_logs
+
+    request_path = Path(os.environ.get("REQUEST_PATH", "/requests/get_bids_request.json").strip())
+    output_format = resolve_format(os.environ.get("OUTPUT_FORMAT", "jsonl"))
+    return merge_batch_logs(request_path.parent, output_format)
+
+
+def run_spool() -> int:
+    # Imported here so one-shot operations do not pay for asyncio or ctypes.
+    import signal
+
+    from result_sinks import parse_fields, resolve_format
+    from sidecar import KeyCache
+    from spool import DirectoryWatcher, SpoolDirectory
+
+    spool_root = os.environ.get("SPOOL_DIR", "").strip()
+    if not spool_root:
+        raise ValueError("SPOOL_DIR is required for OPERATION=spool")
+
+    bootstrap = _create_client()
+    if not bootstrap.config.validate() or not bootstrap.setup_kms_client():
+        return 1
+    keys = KeyCache(bootstrap.fetch_public_key, ttl=_env_float("KMS_KEY_TTL", 3600.0))
+    if not keys.get():
+        return 1
+
+    spool = SpoolDirectory(
+        Path(spool_root),
+        pattern=os.environ.get("SPOOL_PATTERN", "*.jsonl").strip() or "*.jsonl",
+        settle=max(0.0, _env_float("SPOOL_SETTLE_SECONDS", 1.0)),
+    )
+    watcher = DirectoryWatcher(spool.incoming, poll_interval=max(0.1, _env_float("SPOOL_POLL_SECONDS", 2.0)))
+    output_format = resolve_format(os.environ.get("OUTPUT_FORMAT", "jsonl"))
+    output_fields = parse_fields(os.environ.get("OUTPUT_FIELDS", ""))
+    output_order = _output_order()
+    row_group_size = max(1, _env_int("OUTPUT_ROW_GROUP_SIZE", 10000))
+    max_workers = max(1, _env_int("MAX_CONCURRENT_REQUESTS", 2))
+    cache = _create_response_cache(bootstrap)
+    hedger = _create_hedger(max_workers)
+    # One pool for the whole run, so each dispatcher thread keeps its warm client.
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch")
+
+    def process(claimed: Path) -> None:
+        started = time.perf_counter()
+        try:
+            batch_requests = _load_batch_requests(claimed)
+            success_log, failure_log = _open_batch_logs(
+                spool.results_dir(claimed), output_format, output_fields, row_group_size, output_order=output_order
+            )
+            try:
+                _execute_batch(
+                    keys.get(), batch_requests, max_workers, success_log, failure_log,
+                    cache, hedger=hedger, executor=executor,
+                )
+            finally:
+                success_path = success_log.close()
+                failure_log.close()
+            spool.retire(claimed)
+        except Exception as exc:
+            print(f"✗ {claimed.name}: {exc}", file=sys.stderr)
+            try:
+                spool.retire(claimed, ok=False)
+            except OSError as retire_exc:
+                print(f"✗ {claimed.name}: could not move to failed/: {retire_exc}", file=sys.stderr)
+            return
+        print(
+            f"{claimed.name}: {success_log.count} succeeded, {failure_log.count} failed "
+            f"in {time.perf_counter() - started:.2f}s, results in {success_path.parent}"
+        )
+
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+
+    print(f"Watching {spool.incoming} ({watcher.mode})")
+    try:
+        while not stop.is_set():
+            ready, next_settle = spool.scan()
+            for path in ready:
+                if stop.is_set():
+                    break
+                claimed = spool.claim(path)
+                if claimed is not None:
+                    process(claimed)
+            if not ready:
+                watcher.wait(next_settle)
+    finally:
+        watcher.close()
+        executor.shutdown()
+        if hedger is not None:
+            print(f"Hedging: {hedger.stats.summary()}")
+            hedger.close()
+        if cache is not None:
+            _save_response_cache(cache)
+    print("Spool stopped")
+    return 0
+
+
+def run_serve() -> int:
+    # Imported here so one-shot operations do not pay for asyncio at startup.
+    import asyncio
+
+    from sidecar import KeyCache, SidecarServer
+
+    bootstrap = _create_client()
+    if not bootstrap.config.validate() or not bootstrap.setup_kms_client():
+        return 1
+
+    keys = KeyCache(bootstrap.fetch_public_key, ttl=_env_float("KMS_KEY_TTL", 3600.0))
+    if not keys.get():
+        return 1
+
+    server = SidecarServer(
+        _create_worker,
+        keys,
+        workers=max(1, _env_int("SERVE_WORKERS", 8)),
+        max_body_bytes=_env_int("SERVE_MAX_BODY_BYTES", 16 * 1024 * 1024),
+    )
+    host = os.environ.get("SERVE_HOST", "127.0.0.1").strip() or "127.0.0.1"
+    port = _env_int("SERVE_PORT", 8080)
+    try:
+        asyncio.run(server.serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
 
 
 def main() -> int:
     operation = os.environ.get("OPERATION", "rest_invoke").strip().lower()
 
-    if operation in {"rest_invoke", "invoke"}:
+    if operation == "rest_invoke":
+        return run_rest_invoke()
+    if operation == "invoke":
+        # As in the legacy C++ image, OPERATION=invoke targets the gRPC endpoint.
+        if not os.environ.get("BUYER_PROTOCOL", "").strip():
+            os.environ["BUYER_PROTOCOL"] = "grpc"
         return run_rest_invoke()
     if operation in {"encrypt", "encrypt_payload"}:
         return run_encrypt()
     if operation == "batch_invoke":
         return run_batch_invoke()
+    if operation == "merge_shards":
+        return run_merge_shards()
+    if operation == "serve":
+        return run_serve()
+    if operation == "spool":
+        return run_spool()
 
     print(
         f"✗ Unsupported OPERATION '{operation}'. "
-        "Supported: rest_invoke, encrypt, batch_invoke",
+        "Supported: rest_invoke, invoke, encrypt, batch_invoke, merge_shards, serve, spool",
         file=sys.stderr,
     )
     return 1
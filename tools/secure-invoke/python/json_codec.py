@@ -0,0 +1,90 @@
+"""
+JSON codec used by the batch loader and result writers.
+
+Prefers ``orjson``, then ``msgspec``, then the standard library. All encoders
+return UTF-8 ``bytes`` so results can be written to binary sinks without an
+intermediate ``str``, and ``loads`` raises ``ValueError`` on malformed input
+whichever backend is used. ``orjson`` and ``msgspec`` write compact JSON; the
+standard-library ``dumps`` keeps the default ``json.dumps`` layout, so logs
+written without the extras look as they always have. ``dumps_sorted`` is
+compact for every backend, so cache keys match across backends. Set
+``JSON_CODEC`` to ``orjson``, ``msgspec`` or ``json`` to force a backend.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from typing import Any, Callable, Tuple, Union
+
+CODECS = ("orjson", "msgspec", "json")
+
+Loads = Callable[[Union[bytes, str]], Any]
+Dumps = Callable[[Any], bytes]
+
+
+def _stdlib() -> Tuple[Loads, Dumps, Dumps]:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    def dumps_sorted(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, sort_keys=True).encode("utf-8")
+
+    return json.loads, dumps, dumps_sorted
+
+
+def _orjson() -> Tuple[Loads, Dumps, Dumps]:
+    import orjson
+
+    def dumps_sorted(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+
+    return orjson.loads, orjson.dumps, dumps_sorted
+
+
+def _msgspec() -> Tuple[Loads, Dumps, Dumps]:
+    import msgspec
+
+    decoder = msgspec.json.Decoder()
+    encoder = msgspec.json.Encoder()
+    sorted_encoder = msgspec.json.Encoder(order="sorted")
+
+    def loads(data: Union[bytes, str]) -> Any:
+        try:
+            return decoder.decode(data)
+        except msgspec.DecodeError as exc:
+            raise ValueError(str(exc)) from exc
+
+    return loads, encoder.encode, sorted_encoder.encode
+
+
+_LOADERS = {"orjson": _orjson, "msgspec": _msgspec, "json": _stdlib}
+
+
+def select(name: str = "auto") -> Tuple[str, Loads, Dumps, Dumps]:
+    """Return ``(backend, loads, dumps, dumps_sorted)`` for ``name``.
+
+    ``auto`` picks the fastest installed backend. A named backend that is not
+    installed raises ``ValueError``.
+    """
+    name = name.strip().lower() or "auto"
+    if name == "auto":
+        for candidate in CODECS:
+            try:
+                return (candidate, *_LOADERS[candidate]())
+            except ImportError:
+                continue
+    if name not in _LOADERS:
+        raise ValueError(f"Unsupported JSON_CODEC '{name}'. Supported: auto, {', '.join(CODECS)}")
+    try:
+        return (name, *_LOADERS[name]())
+    except ImportError as exc:
+        raise ValueError(f"JSON_CODEC '{name}' is not installed") from exc
+
+
+try:
+    BACKEND, loads, dumps, dumps_sorted = select(os.environ.get("JSON_CODEC", "auto"))
+except ValueError as _exc:
+    print(f"Warning: {_exc}; using the fastest available codec", file=sys.stderr)
+    BACKEND, loads, dumps, dumps_sorted = select("auto")
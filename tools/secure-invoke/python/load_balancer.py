@@ -0,0 +1,239 @@
+"""
+Client-side load balancing across Offer Frontend replicas.
+
+``BUYER_HOST`` may list several endpoints. ``EndpointPool`` tracks, for every
+endpoint, the requests in flight and an exponentially weighted moving average
+(EWMA) of latency, and picks one per call:
+
+* ``p2c`` (default): power of two choices. Sample two healthy endpoints and
+  take the one with the lower ``(in_flight + 1) * latency_ewma``.
+* ``least_outstanding``: the healthy endpoint with the fewest calls in flight.
+
+Health is checked passively from real traffic. An endpoint is ejected after
+``eject_failures`` consecutive failures (connection errors, timeouts, 5xx),
+or when ``slow_factor`` is set and its latency EWMA exceeds that multiple of
+the median of the other healthy endpoints. Ejection lasts ``eject_seconds``
+and doubles each time the endpoint is ejected again without a success in
+between, up to ``max_eject_seconds``. When it ends the endpoint is re-admitted
+with fresh statistics. The last healthy endpoint is never ejected; if every
+endpoint is ejected anyway, the one due back first is used.
+
+``BalancingAdapter`` is a ``requests`` transport adapter mounted for the first
+endpoint's origin. It rewrites each call to the chosen endpoint and hands it to
+that endpoint's own adapter, so plain HTTP/1.1, ``HTTP2`` and gRPC transports
+all work unchanged. A call that fails to connect is retried once on another
+endpoint.
+"""
+
+from __future__ import annotations
+
+import random
+import statistics
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from requests.adapters import BaseAdapter
+from requests.exceptions import ConnectionError as RequestsConnectionError
+from requests.models import PreparedRequest, Response
+
+LB_POLICIES = ("p2c", "least_outstanding")
+
+_EWMA_ALPHA = 0.3
+
+
+class Endpoint:
+    """Load and health state for one endpoint URL."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.ejections = 0
+        self.latency_ewma: Optional[float] = None
+        self.samples = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejection_streak = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejections": self.ejections,
+            "latency_ewma_ms": None if self.latency_ewma is None else round(self.latency_ewma * 1000.0, 3),
+        }
+
+
+class EndpointPool:
+    """Shared, thread-safe endpoint selection and passive health state."""
+
+    def __init__(
+        self,
+        urls: List[str],
+        policy: str = "p2c",
+        eject_failures: int = 3,
+        eject_seconds: float = 10.0,
+        max_eject_seconds: float = 300.0,
+        slow_factor: float = 0.0,
+        min_samples: int = 20,
+    ):
+        if not urls:
+            raise ValueError("At least one endpoint is required")
+        if policy not in LB_POLICIES:
+            raise ValueError(f"Unsupported LB_POLICY '{policy}'. Supported: {', '.join(LB_POLICIES)}")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.policy = policy
+        self.eject_failures = max(1, eject_failures)
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max(eject_seconds, max_eject_seconds)
+        self.slow_factor = slow_factor
+        self.min_samples = max(1, min_samples)
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def _healthy(self, now: float, exclude: Optional[Endpoint]) -> List[Endpoint]:
+        healthy = []
+        for endpoint in self.endpoints:
+            if endpoint is exclude:
+                continue
+            if endpoint.ejected_until:
+                if endpoint.ejected_until > now:
+                    continue
+                # Ejection over: re-admit with fresh statistics.
+                endpoint.ejected_until = 0.0
+                endpoint.latency_ewma = None
+                endpoint.samples = 0
+                endpoint.consecutive_failures = 0
+                print(f"Re-admitted endpoint {endpoint.url}", file=sys.stderr)
+            healthy.append(endpoint)
+        return healthy
+
+    def _cost(self, endpoint: Endpoint, default_latency: float) -> float:
+        latency = endpoint.latency_ewma if endpoint.latency_ewma is not None else default_latency
+        return (endpoint.in_flight + 1) * latency
+
+    def _choose(self, candidates: List[Endpoint]) -> Endpoint:
+        if len(candidates) == 1:
+            return candidates[0]
+        if self.policy == "least_outstanding":
+            fewest = min(endpoint.in_flight for endpoint in candidates)
+            return self._random.choice([e for e in candidates if e.in_flight == fewest])
+        known = [e.latency_ewma for e in candidates if e.latency_ewma is not None]
+        default_latency = statistics.median(known) if known else 1.0
+        first, second = self._random.sample(candidates, 2)
+        return first if self._cost(first, default_latency) <= self._cost(second, default_latency) else second
+
+    def acquire(self, exclude: Optional[Endpoint] = None) -> Endpoint:
+        """Pick an endpoint and count the call as in flight until ``release``."""
+        with self._lock:
+            now = time.monotonic()
+            candidates = self._healthy(now, exclude)
+            if not candidates:
+                others = [e for e in self.endpoints if e is not exclude] or self.endpoints
+                candidates = [min(others, key=lambda e: e.ejected_until)]
+            endpoint = self._choose(candidates)
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, started: float, ok: bool) -> None:
+        """Record the outcome of a call started at ``started`` (``time.monotonic()``)."""
+        with self._lock:
+            now = time.monotonic()
+            latency = now - started
+            endpoint.in_flight -= 1
+            if endpoint.latency_ewma is None:
+                endpoint.latency_ewma = latency
+            else:
+                endpoint.latency_ewma += _EWMA_ALPHA * (latency - endpoint.latency_ewma)
+            endpoint.samples += 1
+            if not ok:
+                endpoint.failures += 1
+            if endpoint.ejected_until:
+                # Completed after ejection; the ejection already accounts for it.
+                return
+            if ok:
+                endpoint.consecutive_failures = 0
+                endpoint.ejection_streak = 0
+            else:
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= self.eject_failures:
+                    self._eject(endpoint, now, f"{endpoint.consecutive_failures} consecutive failures")
+                    return
+            if self.slow_factor > 0 and endpoint.samples >= self.min_samples:
+                others = [
+                    e.latency_ewma for e in self.endpoints
+                    if e is not endpoint and e.ejected_until <= now and e.latency_ewma is not None
+                ]
+                if others:
+                    baseline = statistics.median(others)
+                    if endpoint.latency_ewma > self.slow_factor * baseline:
+                        self._eject(
+                            endpoint,
+                            now,
+                            f"latency {endpoint.latency_ewma * 1000.0:.0f} ms vs {baseline * 1000.0:.0f} ms median",
+                        )
+
+    def _eject(self, endpoint: Endpoint, now: float, reason: str) -> None:
+        if not any(e is not endpoint and e.ejected_until <= now for e in self.endpoints):
+            return
+        duration = min(self.max_eject_seconds, self.eject_seconds * (2 ** endpoint.ejection_streak))
+        endpoint.ejected_until = now + duration
+        endpoint.ejection_streak += 1
+        endpoint.ejections += 1
+        print(f"Warning: ejected endpoint {endpoint.url} for {duration:g}s ({reason})", file=sys.stderr)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [endpoint.as_dict() for endpoint in self.endpoints]
+
+
+class BalancingAdapter(BaseAdapter):
+    """Routes calls for ``prefix`` to endpoints chosen by ``pool``.
+
+    ``adapters`` maps each endpoint URL to the adapter that sends to it.
+    """
+
+    def __init__(self, pool: EndpointPool, prefix: str, adapters: Dict[str, BaseAdapter]):
+        super().__init__()
+        self.pool = pool
+        self.prefix = prefix
+        self.adapters = adapters
+
+    def _route(self, request: PreparedRequest, endpoint: Endpoint) -> PreparedRequest:
+        routed = request.copy()
+        url = request.url or ""
+        if url.startswith(self.prefix):
+            routed.url = endpoint.url + url[len(self.prefix):]
+        return routed
+
+    def send(self, request: PreparedRequest, **kwargs: Any) -> Response:
+        endpoint = self.pool.acquire()
+        retried = False
+        while True:
+            started = time.monotonic()
+            try:
+                response = self.adapters[endpoint.url].send(self._route(request, endpoint), **kwargs)
+            except RequestsConnectionError:
+                self.pool.release(endpoint, started, ok=False)
+                if retried or len(self.pool) < 2:
+                    raise
+                retried = True
+                endpoint = self.pool.acquire(exclude=endpoint)
+                continue
+            except Exception:
+                self.pool.release(endpoint, started, ok=False)
+                raise
+            self.pool.release(endpoint, started, ok=response.status_code < 500)
+            return response
+
+    def close(self) -> None:
+        # Endpoint adapters belong to the session or are shared across workers.
+        pass
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Per-request timing traces for secure-invoke batches.
+
+With ``TRACE_PATH`` set, ``batch_invoke`` writes one JSONL row per request:
+
+* ``queue_wait_ms``: submitted to the executor until a worker picked it up
+* ``setup_ms``: creating the worker (KMS and HTTP clients)
+* ``encrypt_ms``: SDK time before the first HTTP send (encryption, padding,
+  compression and request building)
+* ``connect_ms``: TCP/TLS connection setup
+* ``ttfb_ms``: request sent until response headers, excluding connect
+* ``transfer_ms``: response headers until the body was read
+* ``decrypt_ms``: SDK time after the last HTTP response (decryption, parsing)
+* ``total_ms``, ``attempts`` (HTTP sends), ``worker``, ``status``, ``cache``
+* ``endpoint``: origin of the last HTTP response (the replica chosen when
+  ``BUYER_HOST`` lists several)
+* ``request_bytes`` (plaintext JSON) and ``wire_request_bytes`` (encrypted
+  body), ``wire_response_bytes`` and ``response_bytes`` (decrypted JSON)
+
+The SDK does not expose its phases, so HTTP timings come from wrapping the
+worker's ``requests`` session and urllib3 connects; a field that could not be
+observed is ``null``. The KMS key is fetched once per batch, so ``kms_ms``
+appears on the final ``"type": "batch"`` row.
+
+Running this module summarizes a trace into percentile tables and the
+slowest requests.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from json_codec import dumps, loads
+
+DURATIONS = (
+    "queue_wait_ms",
+    "setup_ms",
+    "encrypt_ms",
+    "connect_ms",
+    "ttfb_ms",
+    "transfer_ms",
+    "decrypt_ms",
+    "total_ms",
+)
+SIZES = ("request_bytes", "wire_request_bytes", "wire_response_bytes", "response_bytes")
+
+_local = threading.local()
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000.0, 3)
+
+
+def current() -> Optional["RequestTrace"]:
+    return getattr(_local, "trace", None)
+
+
+class RequestTrace:
+    """Timing record for one request, filled in by the worker thread."""
+
+    def __init__(self, request_id: int, request_data: Any = None):
+        self.row: Dict[str, Any] = {"type": "request", "id": request_id, "worker": None, "status": None}
+        self.row.update(dict.fromkeys(DURATIONS))
+        self.row.update(dict.fromkeys(SIZES))
+        self.row["attempts"] = 0
+        self.row["cache"] = None
+        self.row["endpoint"] = None
+        if request_data is not None:
+            self.row["request_bytes"] = len(dumps(request_data))
+        self._submitted = time.perf_counter()
+        self._started = self._process_started = self._first_send = self._last_response = None
+        self._instrumented = False
+        self._connect = 0.0
+        self._connecting = False
+        self._http = {"ttfb": 0.0, "transfer": 0.0, "observed": False}
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self.row["queue_wait_ms"] = _ms(self._started - self._submitted)
+        self.row["worker"] = threading.current_thread().name
+        _local.trace = self
+
+    def expire(self) -> Dict[str, Any]:
+        """Row for a request dropped because its deadline passed before dispatch."""
+        self.row["queue_wait_ms"] = _ms(time.perf_counter() - self._submitted)
+        self.row["worker"] = threading.current_thread().name
+        self.row["status"] = "deadline_exceeded"
+        self.row["attempts"] = 0
+        return self.row
+
+    def worker_ready(self, instrumented: bool = True) -> None:
+        self._instrumented = instrumented
+        self._process_started = time.perf_counter()
+        self.row["setup_ms"] = _ms(self._process_started - self._started)
+
+    def on_send(self, request: Any) -> float:
+        now = time.perf_counter()
+        if self._first_send is None:
+            self._first_send = now
+        self.row["attempts"] += 1
+        body = getattr(request, "body", None)
+        if body is not None:
+            self.row["wire_request_bytes"] = len(body)
+        return now
+
+    def on_response(self, sent_at: float, response: Any) -> None:
+        now = time.perf_counter()
+        self._last_response = now
+        url = getattr(response, "url", None)
+        if url:
+            parts = urlsplit(url)
+            self.row["endpoint"] = f"{parts.scheme}://{parts.netloc}"
+        elapsed = getattr(response, "elapsed", None)
+        if elapsed is None:
+            return
+        headers_at = min(elapsed.total_seconds(), now - sent_at)
+        self._http["observed"] = True
+        self._http["ttfb"] += headers_at
+        self._http["transfer"] += (now - sent_at) - headers_at
+        content = getattr(response, "_content", None)
+        if isinstance(content, (bytes, bytearray)):
+            self.row["wire_response_bytes"] = len(content)
+
+    def on_connect(self, seconds: float) -> None:
+        self._connect += seconds
+
+    def finish(self, response: Optional[Dict[str, Any]], error: Optional[str]) -> Dict[str, Any]:
+        end = time.perf_counter()
+        _local.trace = None
+        row = self.row
+        row["status"] = "error" if error else "ok"
+        if not self._instrumented:
+            row["attempts"] = None
+        if self._started is not None:
+            row["total_ms"] = _ms(end - self._started)
+        if self._http["observed"]:
+            row["connect_ms"] = _ms(self._connect)
+            row["ttfb_ms"] = _ms(max(0.0, self._http["ttfb"] - self._connect))
+            row["transfer_ms"] = _ms(self._http["transfer"])
+        if self._process_started is not None and self._first_send is not None:
+            row["encrypt_ms"] = _ms(self._first_send - self._process_started)
+        if self._last_response is not None and error is None:
+            row["decrypt_ms"] = _ms(end - self._last_response)
+        if response is not None:
+            row["response_bytes"] = len(dumps(response))
+        return row
+
+
+def _wrap_session(session: Any) -> None:
+    if getattr(session, "_request_trace_wrapped", False):
+        return
+    send = session.send
+
+    def traced_send(request: Any, **kwargs: Any) -> Any:
+        trace = current()
+        if trace is None:
+            return send(request, **kwargs)
+        sent_at = trace.on_send(request)
+        response = send(request, **kwargs)
+        trace.on_response(sent_at, response)
+        return response
+
+    session.send = traced_send
+    session._request_trace_wrapped = True
+
+
+def instrument(sessions: Iterable[Any]) -> bool:
+    """Wrap the given ``requests`` sessions. Returns False if there were none."""
+    found = False
+    for session in sessions:
+        _wrap_session(session)
+        found = True
+    return found
+
+
+_probe_lock = threading.Lock()
+_probe_installed = False
+
+
+def install_connect_probe() -> None:
+    """Time urllib3 connection setup for the trace active on the calling thread."""
+    global _probe_installed
+    with _probe_lock:
+        if _probe_installed:
+            return
+        _probe_installed = True
+        try:
+            from urllib3.connection import HTTPConnection, HTTPSConnection
+        except ImportError:
+            return
+        for cls in (HTTPConnection, HTTPSConnection):
+            original = cls.__dict__.get("connect")
+            if original is None:
+                continue
+
+            def connect(self: Any, _original: Any = original) -> Any:
+                trace = current()
+                if trace is None or trace._connecting:
+                    return _original(self)
+                trace._connecting = True
+                start = time.perf_counter()
+                try:
+                    return _original(self)
+                finally:
+                    trace._connecting = False
+                    trace.on_connect(time.perf_counter() - start)
+
+            cls.connect = connect
+
+
+class TraceSink:
+    """Thread-safe JSONL writer for trace rows."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._handle = path.open("wb")
+        self._lock = threading.Lock()
+
+    def write(self, row: Dict[str, Any]) -> None:
+        line = dumps(row) + b"\n"
+        with self._lock:
+            # A losing hedged call can finish after the batch closed the trace.
+            if not self._handle.closed:
+                self._handle.write(line)
+
+    def close(self) -> None:
+        with self._lock:
+            self._handle.close()
+
+
+def read_trace(path: Path) -> Iterable[Dict[str, Any]]:
+    with path.open("rb") as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                yield loads(line)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted ``values``."""
+    index = max(0, min(len(values) - 1, math.ceil(pct / 100.0 * len(values)) - 1))
+    return values[index]
+
+
+def _table(rows: List[Dict[str, Any]], fields: Iterable[str], unit: str) -> List[str]:
+    lines = [f"{'field':22s} {'count':>7s} {'p50':>10s} {'p90':>10s} {'p99':>10s} {'max':>10s} {'mean':>10s}"]
+    for field in fields:
+        values = sorted(float(row[field]) for row in rows if row.get(field) is not None)
+        if not values:
+            lines.append(f"{field:22s} {0:>7d} {'-':>10s} {'-':>10s} {'-':>10s} {'-':>10s} {'-':>10s}")
+            continue
+        stats = [percentile(values, 50), percentile(values, 90), percentile(values, 99), values[-1],
+                 sum(values) / len(values)]
+        lines.append(f"{field:22s} {len(values):>7d} " + " ".join(f"{v:>10.{unit}f}" for v in stats))
+    return lines
+
+
+def _slowest_phase(row: Dict[str, Any]) -> str:
+    phases = [(row.get(field) or 0.0, field) for field in DURATIONS if field not in ("queue_wait_ms", "total_ms")]
+    value, field = max(phases)
+    return field[:-3] if value else "-"
+
+
+def summarize(rows: Iterable[Dict[str, Any]], top: int = 10) -> str:
+    requests: List[Dict[str, Any]] = []
+    batches: List[Dict[str, Any]] = []
+    for row in rows:
+        (batches if row.get("type") == "batch" else requests).append(row)
+
+    out = [f"Requests: {len(requests)}"]
+    statuses: Dict[str, int] = {}
+    attempts: Dict[str, int] = {}
+    for row in requests:
+        key = row.get("status") or "unknown"
+        if row.get("cache"):
+            key = f"{key} (cache {row['cache']})"
+        statuses[key] = statuses.get(key, 0) + 1
+        count = "unknown" if row.get("attempts") is None else str(row["attempts"])
+        attempts[count] = attempts.get(count, 0) + 1
+    out.append("Status:   " + ", ".join(f"{k}={v}" for k, v in sorted(statuses.items())))
+    out.append("Attempts: " + ", ".join(f"{k}={v}" for k, v in sorted(attempts.items())))
+    for batch in batches:
+        out.append(f"Batch:    kms_ms={batch.get('kms_ms')} wall_ms={batch.get('wall_ms')} workers={batch.get('workers')}")
+        if batch.get("deadlines") and batch["deadlines"].get("with_deadline"):
+            out.append("Deadline: " + ", ".join(f"{k}={v}" for k, v in batch["deadlines"].items()))
+        if batch.get("hedging"):
+            out.append("Hedging:  " + ", ".join(f"{k}={v}" for k, v in batch["hedging"].items()))
+        for endpoint in batch.get("endpoints") or []:
+            out.append(
+                f"Endpoint: {endpoint['url']} requests={endpoint['requests']} failures={endpoint['failures']} "
+                f"ejections={endpoint['ejections']} latency_ewma_ms={endpoint['latency_ewma_ms']}"
+            )
+    out.append("")
+    out.append("Durations (ms)")
+    out.extend(_table(requests, DURATIONS, "2"))
+    out.append("")
+    out.append("Payload sizes (bytes)")
+    out.extend(_table(requests, SIZES, "0"))
+
+    endpoints = sorted({row["endpoint"] for row in requests if row.get("endpoint")})
+    if len(endpoints) > 1:
+        out.append("")
+        out.append("Total time by endpoint (ms)")
+        by_endpoint = [{row["endpoint"]: row.get("total_ms")} for row in requests if row.get("endpoint")]
+        out.extend(_table(by_endpoint, endpoints, "2"))
+
+    timed = sorted((row for row in requests if row.get("total_ms") is not None),
+                   key=lambda row: row["total_ms"], reverse=True)
+    out.append("")
+    out.append(f"Slowest {min(top, len(timed))} requests")
+    out.append(f"{'id':>12s} {'total_ms':>10s} {'slowest phase':>14s} {'attempts':>8s} {'status':>7s}  worker")
+    for row in timed[:top]:
+        out.append(
+            f"{row['id']!s:>12s} {row['total_ms']:>10.2f} {_slowest_phase(row):>14s} "
+            f"{'-' if row.get('attempts') is None else row['attempts']!s:>8s} "
+            f"{row.get('status') or '-':>7s}  {row.get('worker') or '-'}"
+        )
+    return "\n".join(out)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Summarize a batch_invoke request trace")
+    parser.add_argument("trace", type=Path, help="Trace JSONL written with TRACE_PATH")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest requests to list (default: 10)")
+    args = parser.parse_args()
+    try:
+        print(summarize(read_trace(args.trace), args.top))
+    except (OSError, ValueError) as exc:
+        print(f"✗ Error reading trace: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Response memoization for secure-invoke batches.
+
+Responses are keyed by a canonical hash of the plaintext request body and the
+cache scope (target hosts, protocol and request headers), so identical
+payloads sent to the same place within a batch (and, when persisted, across
+runs) share a single encrypted round-trip to the Offer Frontend.
+
+A persisted cache holds decrypted responses in plaintext. :meth:`ResponseCache.save`
+creates it readable by the owner only.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from json_codec import dumps, dumps_sorted, loads
+
+# (response, error) as returned by the batch worker.
+Outcome = Tuple[Optional[Dict[str, Any]], Optional[str]]
+
+
+def request_key(request_body: Any, scope: Optional[Dict[str, Any]] = None) -> str:
+    """Return a stable hash for a request body and scope, independent of key order."""
+    return hashlib.sha256(dumps_sorted({"request": request_body, "scope": scope})).hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe LRU cache with TTL and in-flight request sharing.
+
+    Only successful responses are cached. Concurrent callers asking for a key
+    that is already being computed wait for the first call instead of issuing
+    their own.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 3600.0, scope: Optional[Dict[str, Any]] = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.scope = scope
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def key(self, request_body: Any) -> str:
+        return request_key(request_body, self.scope)
+
+    def _expiry(self) -> float:
+        return time.time() + self.ttl if self.ttl > 0 else float("inf")
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def _store(self, key: str, response: Dict[str, Any], expires_at: Optional[float] = None) -> None:
+        self._entries[key] = (self._expiry() if expires_at is None else expires_at, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            response = self._lookup(key)
+            if response is not None:
+                self.hits += 1
+            return response
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        with self._lock:
+            self._store(key, response)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Outcome]) -> Outcome:
+        with self._lock:
+            response = self._lookup(key)
+            if response is not None:
+                self.hits += 1
+                return response, None
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+            else:
+                self.shared += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            outcome = compute()
+        except BaseException as exc:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(exc)
+            raise
+
+        response, error = outcome
+        with self._lock:
+            self._inflight.pop(key, None)
+            if error is None and response is not None:
+                self._store(key, response)
+        future.set_result(outcome)
+        return outcome
+
+    def load(self, path: Path) -> int:
+        """Load unexpired entries persisted by :meth:`save`. Returns the count."""
+        if not path.exists():
+            return 0
+        now = time.time()
+        loaded = 0
+        with path.open("rb") as handle, self._lock:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = loads(line)
+                    expires_at = float(row["expires_at"]) if row.get("expires_at") is not None else float("inf")
+                    key, response = row["key"], row["response"]
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    continue
+                if expires_at <= now:
+                    continue
+                self._store(key, response, expires_at)
+                loaded += 1
+        return loaded
+
+    def save(self, path: Path) -> None:
+        """Persist unexpired entries as JSONL, replacing ``path`` atomically.
+
+        Responses are stored decrypted, so the file is created with mode 0600.
+        """
+        now = time.time()
+        tmp_path = path.with_name(path.name + ".tmp")
+        with self._lock:
+            entries = [(k, e, r) for k, (e, r) in self._entries.items() if e > now]
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        # A leftover temporary file keeps its old mode, so set it explicitly.
+        os.fchmod(fd, 0o600)
+        with os.fdopen(fd, "wb") as handle:
+            for key, expires_at, response in entries:
+                row = {
+                    "key": key,
+                    "expires_at": None if expires_at == float("inf") else expires_at,
+                    "response": response,
+                }
+                handle.write(dumps(row) + b"\n")
+        os.replace(tmp_path, path)
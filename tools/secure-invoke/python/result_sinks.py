@@ -0,0 +1,385 @@
+"""
+Output sinks for secure-invoke batch results.
+
+Supported formats:
+
+* ``jsonl``      plain JSON lines
+* ``jsonl.gz``   gzip-compressed JSON lines, streamed
+* ``jsonl.zst``  zstd-compressed JSON lines (requires ``zstandard``)
+* ``parquet``    Arrow/Parquet row groups (requires ``pyarrow``)
+* ``records``    compact binary row groups of zlib-compressed JSON lines
+
+Rows may be projected to a subset of response fields before writing, e.g.
+``bids[].ad,bids[].bid,bids[].render``.
+
+``SortedLogWriter`` takes rows in completion order and writes an id-sorted log
+without holding the whole batch: full buffers are sorted and spilled to
+temporary ``records`` runs, which are k-way merged into the sink on close.
+``StreamingLogWriter`` skips the ordering and writes rows to the sink as they
+arrive, so row groups are flushed while the batch is still running.
+"""
+
+from __future__ import annotations
+
+import gzip
+import heapq
+import struct
+import sys
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from json_codec import dumps, loads
+
+OUTPUT_FORMATS = ("jsonl", "jsonl.gz", "jsonl.zst", "parquet", "records")
+
+_EXTENSIONS = {
+    "jsonl": ".jsonl",
+    "jsonl.gz": ".jsonl.gz",
+    "jsonl.zst": ".jsonl.zst",
+    "parquet": ".parquet",
+    "records": ".rec",
+}
+
+RECORDS_MAGIC = b"DEPAREC1"
+PARQUET_JSON_COLUMNS = ("response", "error")
+_GROUP_HEADER = struct.Struct("<II")
+
+
+def parse_fields(spec: str) -> Optional[Dict[str, Any]]:
+    """Parse ``a.b,c[].d`` into a projection tree; ``None`` keeps everything."""
+    tree: Dict[str, Any] = {}
+    for raw in spec.split(","):
+        raw = raw.strip()
+        if not raw:
+            continue
+        node = tree
+        for part in raw.split("."):
+            if part.endswith("[]"):
+                node = node.setdefault(part[:-2], {}).setdefault("[]", {})
+            else:
+                node = node.setdefault(part, {})
+    return tree or None
+
+
+def project(value: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    if not tree:
+        return value
+    if "[]" in tree:
+        if not isinstance(value, list):
+            return None
+        return [project(item, tree["[]"]) for item in value]
+    if not isinstance(value, dict):
+        return None
+    return {key: project(value[key], sub) for key, sub in tree.items() if key in value}
+
+
+def _open_binary(path: Path, fmt: str, mode: str):
+    if fmt == "jsonl.gz":
+        return gzip.open(path, mode)
+    if fmt == "jsonl.zst":
+        import zstandard
+
+        return zstandard.open(path, mode)
+    return path.open(mode)
+
+
+class JsonlSink:
+    def __init__(self, path: Path, fmt: str):
+        self.path = path
+        self._handle = _open_binary(path, fmt, "wb")
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._handle.write(dumps(row) + b"\n")
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+class RecordSink:
+    """Row groups of ``<II`` (row count, byte length) followed by zlib data."""
+
+    def __init__(self, path: Path, row_group_size: int):
+        self.path = path
+        self.row_group_size = row_group_size
+        self._rows: List[bytes] = []
+        self._handle = path.open("wb")
+        self._handle.write(RECORDS_MAGIC)
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._rows.append(dumps(row))
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._rows:
+            return
+        data = zlib.compress(b"\n".join(self._rows))
+        self._handle.write(_GROUP_HEADER.pack(len(self._rows), len(data)))
+        self._handle.write(data)
+        self._rows = []
+
+    def close(self) -> None:
+        self._flush()
+        self._handle.close()
+
+
+class ParquetSink:
+    """Writes one Parquet row group per ``row_group_size`` rows.
+
+    The schema is fixed: an ``int64`` ``id`` plus ``response`` and ``error``
+    as JSON text, null when a row has no such field. Responses differ from row
+    to row (empty bid lists, empty objects, keys that only some rows carry), so
+    they are not mapped to nested Parquet types. The trade-off is that only
+    ``id`` is a real column: readers must parse ``response`` to filter on bid
+    fields, and the file compresses like zstd JSON lines rather than like
+    typed columns.
+    """
+
+    def __init__(self, path: Path, row_group_size: int):
+        import pyarrow
+        import pyarrow.parquet
+
+        self._pa = pyarrow
+        self.path = path
+        self.row_group_size = row_group_size
+        self._rows: List[Dict[str, Any]] = []
+        self._schema = pyarrow.schema(
+            [("id", pyarrow.int64())] + [(name, pyarrow.large_string()) for name in PARQUET_JSON_COLUMNS]
+        )
+        self._writer = pyarrow.parquet.ParquetWriter(str(path), self._schema, compression="zstd")
+
+    def write(self, row: Dict[str, Any]) -> None:
+        extra = set(row) - {"id", *PARQUET_JSON_COLUMNS}
+        if extra:
+            raise ValueError(f"Unsupported parquet columns: {', '.join(sorted(extra))}")
+        self._rows.append(row)
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._rows:
+            return
+        columns: Dict[str, List[Any]] = {"id": [row["id"] for row in self._rows]}
+        for name in PARQUET_JSON_COLUMNS:
+            columns[name] = [dumps(row[name]).decode() if name in row else None for row in self._rows]
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+        self._rows = []
+
+    def close(self) -> None:
+        try:
+            self._flush()
+        finally:
+            self._writer.close()
+
+
+def resolve_format(fmt: str) -> str:
+    """Validate ``fmt`` and fall back when an optional dependency is missing."""
+    fmt = fmt.strip().lower() or "jsonl"
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported OUTPUT_FORMAT '{fmt}'. Supported: {', '.join(OUTPUT_FORMATS)}")
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            print("Warning: pyarrow not installed, writing 'records' instead of 'parquet'", file=sys.stderr)
+            return "records"
+    if fmt == "jsonl.zst":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            print("Warning: zstandard not installed, writing 'jsonl.gz' instead of 'jsonl.zst'", file=sys.stderr)
+            return "jsonl.gz"
+    return fmt
+
+
+def extension(fmt: str) -> str:
+    return _EXTENSIONS[fmt]
+
+
+def open_sink(directory: Path, stem: str, fmt: str, row_group_size: int = 10000):
+    path = directory / f"{stem}{_EXTENSIONS[fmt]}"
+    if fmt == "parquet":
+        return ParquetSink(path, row_group_size)
+    if fmt == "records":
+        return RecordSink(path, row_group_size)
+    return JsonlSink(path, fmt)
+
+
+def _project_row(row: Dict[str, Any], fields: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if fields is not None and "response" in row:
+        return {"id": row["id"], "response": project(row["response"], fields)}
+    return row
+
+
+def write_rows(
+    directory: Path,
+    stem: str,
+    rows: Iterable[Dict[str, Any]],
+    fmt: str = "jsonl",
+    fields: Optional[Dict[str, Any]] = None,
+    row_group_size: int = 10000,
+) -> Path:
+    """Stream ``rows`` into a sink, projecting each ``response`` through ``fields``."""
+    sink = open_sink(directory, stem, fmt, row_group_size)
+    try:
+        for row in rows:
+            sink.write(_project_row(row, fields))
+    finally:
+        sink.close()
+    return sink.path
+
+
+class SortedLogWriter:
+    """Writes rows arriving in any order as one id-sorted log, in bounded memory.
+
+    At most ``run_size`` rows are held at once. A full buffer is sorted and
+    spilled to a hidden ``.<stem>.run-NNNNN.rec`` file next to the log, and
+    ``close`` merges the runs into the final sink. If the sink fails, the error
+    is printed and the log is written as JSONL instead; if that fails too, the
+    spilled runs are left in place for recovery with ``read_records``.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        stem: str,
+        fmt: str = "jsonl",
+        fields: Optional[Dict[str, Any]] = None,
+        row_group_size: int = 10000,
+        run_size: int = 10000,
+    ):
+        self.directory = directory
+        self.stem = stem
+        self.fmt = fmt
+        self.fields = fields
+        self.row_group_size = row_group_size
+        self.run_size = max(1, run_size)
+        self.count = 0
+        self._rows: List[Dict[str, Any]] = []
+        self._runs: List[Path] = []
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._rows.append(_project_row(row, self.fields))
+        self.count += 1
+        if len(self._rows) >= self.run_size:
+            self._spill()
+
+    def _spill(self) -> None:
+        self._rows.sort(key=lambda row: row["id"])
+        sink = RecordSink(self.directory / f".{self.stem}.run-{len(self._runs):05d}.rec", self.row_group_size)
+        self._runs.append(sink.path)
+        try:
+            for row in self._rows:
+                sink.write(row)
+        finally:
+            sink.close()
+        self._rows = []
+
+    def _merged(self) -> Iterator[Dict[str, Any]]:
+        self._rows.sort(key=lambda row: row["id"])
+        streams = [read_records(run) for run in self._runs] + [iter(self._rows)]
+        return heapq.merge(*streams, key=lambda row: row["id"])
+
+    def close(self) -> Path:
+        try:
+            path = write_rows(self.directory, self.stem, self._merged(), self.fmt, row_group_size=self.row_group_size)
+        except Exception as exc:
+            if self.fmt == "jsonl":
+                raise
+            (self.directory / f"{self.stem}{_EXTENSIONS[self.fmt]}").unlink(missing_ok=True)
+            print(f"✗ Could not write {self.stem} as {self.fmt} ({exc}); writing jsonl instead", file=sys.stderr)
+            path = write_rows(self.directory, self.stem, self._merged(), "jsonl")
+        for run in self._runs:
+            run.unlink()
+        self._runs = []
+        self._rows = []
+        return path
+
+
+class StreamingLogWriter:
+    """Writes rows to the sink in arrival order, with no buffering beyond one row group.
+
+    Nothing is spilled, so each row is written once, but the log is not sorted
+    by id. If the sink fails, the error is printed and that row and every later
+    one go to ``<stem>.jsonl``; rows the sink already took stay in its file.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        stem: str,
+        fmt: str = "jsonl",
+        fields: Optional[Dict[str, Any]] = None,
+        row_group_size: int = 10000,
+    ):
+        self.directory = directory
+        self.stem = stem
+        self.fmt = fmt
+        self.fields = fields
+        self.count = 0
+        self._sink = open_sink(directory, stem, fmt, row_group_size)
+        self._fallback: Optional[JsonlSink] = None
+
+    def write(self, row: Dict[str, Any]) -> None:
+        row = _project_row(row, self.fields)
+        self.count += 1
+        if self._fallback is None:
+            try:
+                self._sink.write(row)
+                return
+            except Exception as exc:
+                if self.fmt == "jsonl":
+                    raise
+                print(f"✗ Could not write {self.stem} as {self.fmt} ({exc}); writing jsonl instead", file=sys.stderr)
+                self._fallback = JsonlSink(self.directory / f"{self.stem}.jsonl", "jsonl")
+        self._fallback.write(row)
+
+    def close(self) -> Path:
+        try:
+            self._sink.close()
+        finally:
+            if self._fallback is not None:
+                self._fallback.close()
+        return self._sink.path if self._fallback is None else self._fallback.path
+
+
+def read_records(path: Path) -> Iterator[Dict[str, Any]]:
+    """Iterate rows written by :class:`RecordSink`."""
+    with path.open("rb") as handle:
+        if handle.read(len(RECORDS_MAGIC)) != RECORDS_MAGIC:
+            raise ValueError(f"{path}: not a records file")
+        while True:
+            header = handle.read(_GROUP_HEADER.size)
+            if not header:
+                return
+            if len(header) < _GROUP_HEADER.size:
+                raise EOFError(f"{path}: truncated row group header")
+            _, length = _GROUP_HEADER.unpack(header)
+            data = handle.read(length)
+            if len(data) < length:
+                raise EOFError(f"{path}: truncated row group")
+            for line in zlib.decompress(data).split(b"\n"):
+                yield loads(line)
+
+
+def iter_rows(path: Path, fmt: str) -> Iterator[Dict[str, Any]]:
+    """Iterate rows from a file written by any sink, in file order."""
+    if fmt == "records":
+        yield from read_records(path)
+        return
+    if fmt == "parquet":
+        import pyarrow.parquet
+
+        for batch in pyarrow.parquet.ParquetFile(str(path)).iter_batches():
+            for row in batch.to_pylist():
+                yield {
+                    key: value if key == "id" else loads(value)
+                    for key, value in row.items()
+                    if value is not None
+                }
+        return
+    with _open_binary(path, fmt, "rb") as handle:
+        for line in handle:
+            if line.strip():
+                yield loads(line)
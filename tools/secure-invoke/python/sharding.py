@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Sharded batch execution helpers for secure invoke.
+
+A batch file is split across ``SHARD_COUNT`` processes:
+
+* ``range`` (default) gives each shard a contiguous byte range. A line belongs
+  to the shard whose range contains its first byte, so shards only seek to
+  their start offset and read up to their end offset.
+* ``hash`` reads the whole file and keeps lines whose request id, hashed with
+  CRC32, modulo the shard count equals the shard index. The id is matched
+  from a leading ``"id"`` key without decoding the line; other lines are
+  decoded once to find it. A line with no usable id goes to shard 0, whose
+  loader reports the error.
+
+Each shard writes id-sorted ``<stem>.shard-XXXXX-of-YYYYY`` logs. Running this
+module (or ``OPERATION=merge_shards``) k-way merges them into the final logs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import re
+import sys
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from json_codec import loads
+from result_sinks import OUTPUT_FORMATS, extension, iter_rows, write_rows
+
+SHARD_MODES = ("range", "hash")
+
+_SHARD_SUFFIX = re.compile(r"\.shard-(\d+)-of-(\d+)$")
+_LEADING_ID = re.compile(rb'\s*\{\s*"id"\s*:\s*(-?\d+)\s*[,}]')
+
+
+def shard_stem(stem: str, index: int, count: int) -> str:
+    if count <= 1:
+        return stem
+    return f"{stem}.shard-{index:05d}-of-{count:05d}"
+
+
+def validate_shard(index: int, count: int, mode: str) -> None:
+    if count < 1:
+        raise ValueError("SHARD_COUNT must be at least 1")
+    if not 0 <= index < count:
+        raise ValueError(f"SHARD_INDEX must be in [0, {count - 1}], got {index}")
+    if mode not in SHARD_MODES:
+        raise ValueError(f"Unsupported SHARD_MODE '{mode}'. Supported: {', '.join(SHARD_MODES)}")
+
+
+def _iter_range(path: Path, index: int, count: int) -> Iterator[Tuple[str, bytes]]:
+    size = path.stat().st_size
+    start = size * index // count
+    end = size * (index + 1) // count
+    with path.open("rb") as handle:
+        pos = start
+        if start > 0:
+            handle.seek(start - 1)
+            if handle.read(1) != b"\n":
+                # The line straddling ``start`` belongs to the previous shard.
+                pos += len(handle.readline())
+        while pos < end:
+            line = handle.readline()
+            if not line:
+                break
+            yield f"Byte offset {pos}", line
+            pos += len(line)
+
+
+def _line_id(line: bytes) -> Optional[int]:
+    match = _LEADING_ID.match(line)
+    if match:
+        return int(match.group(1))
+    try:
+        payload = loads(line)
+        return int(payload["id"])
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+def hash_shard(request_id: int, count: int) -> int:
+    return zlib.crc32(str(request_id).encode()) % count
+
+
+def _iter_hash(path: Path, index: int, count: int) -> Iterator[Tuple[str, bytes]]:
+    with path.open("rb") as handle:
+        for line_no, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            request_id = _line_id(line)
+            shard = 0 if request_id is None else hash_shard(request_id, count)
+            if shard == index:
+                yield f"Line {line_no}", line
+
+
+def iter_shard_lines(
+    path: Path,
+    index: int = 0,
+    count: int = 1,
+    mode: str = "range",
+) -> Iterator[Tuple[str, bytes]]:
+    """Yield ``(location, raw_line)`` for the lines assigned to one shard."""
+    if count <= 1:
+        with path.open("rb") as handle:
+            for line_no, line in enumerate(handle, start=1):
+                yield f"Line {line_no}", line
+        return
+    if mode == "hash":
+        yield from _iter_hash(path, index, count)
+    else:
+        yield from _iter_range(path, index, count)
+
+
+def find_shard_logs(directory: Path, stem: str, fmt: str) -> List[Path]:
+    """Return the shard logs for ``stem``, ordered by shard index.
+
+    Raises ``ValueError`` when shards disagree on the count or some are missing.
+    """
+    ext = extension(fmt)
+    found: Dict[int, Path] = {}
+    counts = set()
+    for path in directory.glob(f"{stem}.shard-*-of-*{ext}"):
+        match = _SHARD_SUFFIX.search(path.name[: -len(ext)])
+        if not match:
+            continue
+        found[int(match.group(1))] = path
+        counts.add(int(match.group(2)))
+    if not found:
+        return []
+    if len(counts) != 1:
+        raise ValueError(f"{stem}: shard logs disagree on shard count: {sorted(counts)}")
+    count = counts.pop()
+    missing = [i for i in range(count) if i not in found]
+    if missing:
+        raise ValueError(f"{stem}: missing shard logs for indexes {missing}")
+    return [found[i] for i in range(count)]
+
+
+def merge_shard_logs(directory: Path, stem: str, fmt: str = "jsonl") -> Tuple[Path, int]:
+    """Stream a k-way merge of id-sorted shard logs into ``<stem><ext>``."""
+    paths = find_shard_logs(directory, stem, fmt)
+    if not paths:
+        raise ValueError(f"No shard logs found for {stem} in {directory}")
+    merged_count = 0
+
+    def counted(rows: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        nonlocal merged_count
+        for row in rows:
+            merged_count += 1
+            yield row
+
+    streams = [iter_rows(path, fmt) for path in paths]
+    merged = heapq.merge(*streams, key=lambda row: row["id"])
+    output = write_rows(directory, stem, counted(merged), fmt)
+    return output, merged_count
+
+
+def merge_batch_logs(directory: Path, fmt: str = "jsonl") -> int:
+    for stem in ("success_log", "failure_log"):
+        try:
+            output, count = merge_shard_logs(directory, stem, fmt)
+        except ValueError as exc:
+            print(f"✗ {exc}", file=sys.stderr)
+            return 1
+        print(f"Merged {count} rows into {output}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Merge per-shard batch_invoke logs")
+    parser.add_argument("directory", type=Path, help="Directory containing the shard logs")
+    parser.add_argument("--format", default="jsonl", choices=OUTPUT_FORMATS, help="Format of the shard logs")
+    args = parser.parse_args()
+    return merge_batch_logs(args.directory, args.format)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+Long-running secure-invoke sidecar.
+
+Serves a local plaintext HTTP API on top of warm secure-invoke clients:
+
+* ``POST /`` (any path) with a plaintext GetBids JSON body returns the
+  decrypted response JSON.
+* ``GET /healthz`` reports the current KMS key id.
+
+The KMS public key is fetched once and refreshed after ``key_ttl`` seconds.
+Each worker thread keeps one client whose KMS and HTTP sessions stay open, so
+requests reuse pooled upstream connections instead of paying startup, key
+fetch and TLS setup per call. Client connections are handled with asyncio;
+the blocking SDK calls run on the worker thread pool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from json_codec import dumps, loads
+
+_MAX_HEADERS = 100
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    501: "Not Implemented",
+    502: "Bad Gateway",
+    503: "Service Unavailable",
+}
+
+
+class KeyCache:
+    """Holds the KMS public key and refreshes it after ``ttl`` seconds."""
+
+    def __init__(self, fetch: Callable[[], Optional[Dict[str, Any]]], ttl: float = 3600.0):
+        self._fetch = fetch
+        self.ttl = ttl
+        self._key: Optional[Dict[str, Any]] = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            stale = self._key is None or (self.ttl > 0 and time.monotonic() - self._fetched_at >= self.ttl)
+            if stale:
+                key = self._fetch()
+                if key:
+                    self._key = key
+                    self._fetched_at = time.monotonic()
+                elif self._key is not None:
+                    print("Warning: KMS key refresh failed, keeping previous key", file=sys.stderr)
+            return self._key
+
+
+class SidecarServer:
+    def __init__(
+        self,
+        create_worker: Callable[[], Any],
+        keys: KeyCache,
+        workers: int = 8,
+        max_body_bytes: int = 16 * 1024 * 1024,
+    ):
+        self._create_worker = create_worker
+        self.keys = keys
+        self.max_body_bytes = max_body_bytes
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sidecar")
+        self._local = threading.local()
+
+    def _worker(self) -> Any:
+        worker = getattr(self._local, "worker", None)
+        if worker is None:
+            worker = self._create_worker()
+            self._local.worker = worker
+        return worker
+
+    def invoke(self, request_data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        public_key = self.keys.get()
+        if not public_key:
+            return None, "No KMS public key available"
+        try:
+            result = self._worker().process_single_request(request_data, public_key)
+        except Exception as exc:
+            # Drop the client so the next request on this thread starts clean.
+            self._local.worker = None
+            return None, str(exc)
+        if result is None:
+            return None, "Request processing failed"
+        return result, None
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, body: Dict[str, Any], keep_alive: bool) -> None:
+        payload = dumps(body)
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + payload)
+        await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                except ValueError:
+                    # StreamReader turns a line over its 64 KiB limit into ValueError.
+                    await self._respond(writer, 400, {"error": {"message": "Request line too long"}}, False)
+                    return
+                if not request_line.strip():
+                    return
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": {"message": "Malformed request line"}}, False)
+                    return
+
+                headers: Dict[str, str] = {}
+                header_lines = 0
+                while True:
+                    try:
+                        line = await reader.readline()
+                    except ValueError:
+                        await self._respond(writer, 431, {"error": {"message": "Header line too long"}}, False)
+                        return
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    header_lines += 1
+                    if header_lines > _MAX_HEADERS:
+                        await self._respond(writer, 431, {"error": {"message": "Too many headers"}}, False)
+                        return
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                # Bodies must be delimited by Content-Length. Anything else cannot be
+                # skipped safely, so those connections are closed after the error.
+                transfer_encoding = headers.get("transfer-encoding", "").lower()
+                if transfer_encoding:
+                    if transfer_encoding == "chunked":
+                        status, message = 411, "Chunked bodies are not supported, send Content-Length"
+                    else:
+                        status, message = 501, f"Unsupported Transfer-Encoding {transfer_encoding}"
+                    await self._respond(writer, status, {"error": {"message": message}}, False)
+                    return
+                content_length = headers.get("content-length", "0") or "0"
+                if not (content_length.isascii() and content_length.isdigit()):
+                    await self._respond(writer, 400, {"error": {"message": "Invalid Content-Length"}}, False)
+                    return
+                length = int(content_length)
+                if length > self.max_body_bytes:
+                    await self._respond(writer, 413, {"error": {"message": "Request body too large"}}, False)
+                    return
+                body = await reader.readexactly(length) if length else b""
+
+                if method == "GET" and path.rstrip("/") == "/healthz":
+                    key = await loop.run_in_executor(self._executor, self.keys.get)
+                    if key:
+                        await self._respond(writer, 200, {"status": "ok", "key_id": key.get("key_id")}, keep_alive)
+                    else:
+                        await self._respond(writer, 503, {"status": "no_key"}, keep_alive)
+                elif method != "POST":
+                    await self._respond(writer, 405, {"error": {"message": f"Unsupported method {method}"}}, keep_alive)
+                else:
+                    try:
+                        request_data = loads(body)
+                    except ValueError as exc:
+                        await self._respond(writer, 400, {"error": {"message": f"Invalid JSON: {exc}"}}, keep_alive)
+                    else:
+                        response, error = await loop.run_in_executor(self._executor, self.invoke, request_data)
+                        if error:
+                            await self._respond(writer, 502, {"error": {"message": error}}, keep_alive)
+                        else:
+                            await self._respond(writer, 200, response, keep_alive)
+
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self._handle, host, port)
+        addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+        print(f"Secure invoke sidecar listening on {addresses}")
+        async with server:
+            await server.serve_forever()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,161 @@
+"""
+Spool directory for continuous batch ingestion.
+
+``OPERATION=spool`` watches ``SPOOL_DIR/incoming`` for batch files. The
+layout under ``SPOOL_DIR`` is::
+
+    incoming/    producers drop JSONL batch files here
+    processing/  files claimed by a running instance
+    done/        inputs that were processed
+    failed/      inputs that could not be read or parsed
+    results/     results/<claimed stem>/success_log.<ext> and failure_log.<ext>
+
+A file is claimed by renaming it into ``processing/``, which is atomic on one
+filesystem, so several instances can share a spool without processing a file
+twice. The claimed name carries a UTC timestamp and a random tag
+(``batch.20240101T120000-1a2b3c4d.jsonl``), so a producer reusing a file name
+never overwrites an earlier claim or its results. Names starting with ``.``
+or ending in ``.tmp``/``.part`` are ignored, and a file is only picked up
+once its mtime is ``settle`` seconds old, so producers that write in place
+are not read half-way. Writing to a temporary name and renaming into
+``incoming/`` is still the safest option.
+
+``DirectoryWatcher`` wakes up on inotify events (through ``ctypes``, Linux
+only) and falls back to polling. The directory is rescanned at least every
+``poll_interval`` seconds either way, since inotify does not see writes made
+from other hosts on network filesystems.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+_IGNORED_SUFFIXES = (".tmp", ".part")
+
+
+class SpoolDirectory:
+    """Claims and retires batch files under ``root``."""
+
+    def __init__(self, root: Path, pattern: str = "*.jsonl", settle: float = 1.0):
+        self.root = root
+        self.pattern = pattern
+        self.settle = settle
+        self.incoming = root / "incoming"
+        self.processing = root / "processing"
+        self.done = root / "done"
+        self.failed = root / "failed"
+        self.results = root / "results"
+        for directory in (self.incoming, self.processing, self.done, self.failed, self.results):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def _candidate(self, name: str) -> bool:
+        if name.startswith(".") or name.endswith(_IGNORED_SUFFIXES):
+            return False
+        return fnmatch.fnmatch(name, self.pattern)
+
+    def scan(self) -> Tuple[List[Path], Optional[float]]:
+        """Settled files, oldest first, and seconds until the next one settles (or None)."""
+        now = time.time()
+        ready = []
+        next_settle: Optional[float] = None
+        with os.scandir(self.incoming) as entries:
+            for entry in entries:
+                if not self._candidate(entry.name):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    mtime = entry.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                age = now - mtime
+                if age >= self.settle:
+                    ready.append((mtime, entry.name))
+                else:
+                    wait = self.settle - age
+                    next_settle = wait if next_settle is None else min(next_settle, wait)
+        return [self.incoming / name for _, name in sorted(ready)], next_settle
+
+    def claim(self, path: Path) -> Optional[Path]:
+        """Move ``path`` into ``processing/`` under a unique name; None if another instance took it first."""
+        tag = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+        claimed = self.processing / f"{path.stem}.{tag}{path.suffix}"
+        try:
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            return None
+        return claimed
+
+    def results_dir(self, claimed: Path) -> Path:
+        # Claimed names are unique, so an existing directory means a bug, not a resubmission.
+        directory = self.results / claimed.stem
+        directory.mkdir(parents=True)
+        return directory
+
+    def retire(self, claimed: Path, ok: bool = True) -> Path:
+        """Move a claimed file to ``done/`` (or ``failed/``), keeping its unique name."""
+        target = (self.done if ok else self.failed) / claimed.name
+        os.rename(claimed, target)
+        return target
+
+
+class DirectoryWatcher:
+    """Blocks until ``path`` changes or a timeout passes."""
+
+    def __init__(self, path: Path, poll_interval: float = 2.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+        try:
+            self._fd = self._inotify(path)
+        except (OSError, AttributeError):
+            self._fd = None
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._fd is not None else "polling"
+
+    @staticmethod
+    def _inotify(path: Path) -> int:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(fd, os.fsencode(path), _IN_CLOSE_WRITE | _IN_MOVED_TO) < 0:
+            errno = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno, f"inotify_add_watch failed for {path}")
+        return fd
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Return after an inotify event or ``timeout`` (default ``poll_interval``) seconds."""
+        timeout = self.poll_interval if timeout is None else min(timeout, self.poll_interval)
+        if self._fd is None:
+            time.sleep(timeout)
+            return
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if readable:
+            # Events are only a wake-up; the caller rescans the directory.
+            try:
+                while os.read(self._fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,11 @@
+"""
+Tests for the secure-invoke helper modules.
+
+The modules are flat files next to ``invoke.py``, so their directory is put on
+``sys.path``. Tests do not import ``invoke`` itself, which needs the SDK.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,123 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from batch_scheduler import BatchScheduler
+
+
+def _drain(scheduler):
+    executed, expired = [], []
+    stats = scheduler.run(executed.append, expired.append)
+    return executed, expired, stats
+
+
+def test_priority_then_deadline_then_file_order():
+    now = time.monotonic()
+    scheduler = BatchScheduler(1)
+    scheduler.push("low")
+    scheduler.push("plain-1")
+    scheduler.push("later", deadline=now + 60)
+    scheduler.push("plain-2")
+    scheduler.push("sooner", deadline=now + 30)
+    scheduler.push("urgent", priority=5)
+    scheduler.push("negative", priority=-1)
+    scheduler.push("urgent-sooner", priority=5, deadline=now + 90)
+    assert len(scheduler) == 8
+
+    executed, expired, stats = _drain(scheduler)
+
+    assert executed == ["urgent-sooner", "urgent", "sooner", "later", "low", "plain-1", "plain-2", "negative"]
+    assert expired == []
+    assert stats.as_dict() == {"with_deadline": 3, "expired": 0, "late": 0}
+    assert len(scheduler) == 0
+
+
+def test_expired_items_are_not_executed():
+    now = time.monotonic()
+    scheduler = BatchScheduler(1)
+    scheduler.push("gone", priority=9, deadline=now - 1)
+    scheduler.push("kept", deadline=now + 60)
+    scheduler.push("no-deadline")
+
+    executed, expired, stats = _drain(scheduler)
+
+    assert executed == ["kept", "no-deadline"]
+    assert expired == ["gone"]
+    assert stats.as_dict() == {"with_deadline": 2, "expired": 1, "late": 0}
+
+
+def test_deadline_passing_while_queued_expires_item():
+    scheduler = BatchScheduler(1)
+    scheduler.push("slow", priority=1)
+    scheduler.push("waiting", deadline=time.monotonic() + 0.05)
+
+    expired = []
+    scheduler.run(lambda item: time.sleep(0.1), expired.append)
+
+    assert expired == ["waiting"]
+    assert scheduler.stats.expired == 1
+
+
+def test_late_completion_is_counted():
+    scheduler = BatchScheduler(1)
+    scheduler.push("slow", deadline=time.monotonic() + 0.02)
+
+    stats = scheduler.run(lambda item: time.sleep(0.05), lambda item: None)
+
+    assert stats.as_dict() == {"with_deadline": 1, "expired": 0, "late": 1}
+
+
+def test_urgent_item_is_not_queued_behind_dispatched_work():
+    # One dispatcher: an item pushed while another runs goes next, ahead of
+    # lower-priority items that were queued first.
+    scheduler = BatchScheduler(1)
+    for index in range(3):
+        scheduler.push(f"bulk-{index}")
+    order = []
+
+    def execute(item):
+        order.append(item)
+        if item == "bulk-0":
+            scheduler.push("urgent", priority=1)
+
+    scheduler.run(execute, lambda item: None)
+    assert order == ["bulk-0", "urgent", "bulk-1", "bulk-2"]
+
+
+def test_workers_run_in_parallel_on_caller_executor():
+    scheduler = BatchScheduler(3)
+    for index in range(6):
+        scheduler.push(index)
+    threads = set()
+    lock = threading.Lock()
+
+    def execute(item):
+        with lock:
+            threads.add(threading.current_thread().name)
+        time.sleep(0.05)
+
+    with ThreadPoolExecutor(3, thread_name_prefix="warm") as pool:
+        started = time.monotonic()
+        scheduler.run(execute, lambda item: None, executor=pool)
+        elapsed = time.monotonic() - started
+
+    assert len(threads) == 3
+    assert all(name.startswith("warm") for name in threads)
+    assert elapsed < 0.25
+
+
+def test_errors_propagate():
+    scheduler = BatchScheduler(2)
+    scheduler.push("boom")
+
+    def execute(item):
+        raise RuntimeError(item)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        scheduler.run(execute, lambda item: None)
+
+
+def test_at_least_one_worker():
+    assert BatchScheduler(0).workers == 1
@@ -0,0 +1,122 @@
+import base64
+import json
+
+import pytest
+
+from grpc_transport import _varint, decode_get_bids_response, encode_get_bids_request
+
+CIPHERTEXT = bytes(range(256)) * 3  # long enough for a multi-byte length varint
+
+
+@pytest.fixture(scope="module")
+def messages():
+    """GetBidsRequest/GetBidsResponse classes built from the documented schema."""
+    pytest.importorskip("google.protobuf")
+    from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+
+    proto = descriptor_pb2.FileDescriptorProto(name="get_bids_test.proto", package="test", syntax="proto3")
+    request = proto.message_type.add(name="GetBidsRequest")
+    request.field.add(name="request_ciphertext", number=1, type=descriptor_pb2.FieldDescriptorProto.TYPE_BYTES,
+                      label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL)
+    request.field.add(name="key_id", number=2, type=descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+                      label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL)
+    response = proto.message_type.add(name="GetBidsResponse")
+    response.field.add(name="response_ciphertext", number=1, type=descriptor_pb2.FieldDescriptorProto.TYPE_BYTES,
+                       label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL)
+    pool = descriptor_pool.DescriptorPool()
+    pool.Add(proto)
+    return (
+        message_factory.GetMessageClass(pool.FindMessageTypeByName("test.GetBidsRequest")),
+        message_factory.GetMessageClass(pool.FindMessageTypeByName("test.GetBidsResponse")),
+    )
+
+
+def test_request_encodes_as_protobuf(messages):
+    request_cls, _ = messages
+    parsed = request_cls.FromString(encode_get_bids_request(CIPHERTEXT, "key-ü-7"))
+    assert parsed.request_ciphertext == CIPHERTEXT
+    assert parsed.key_id == "key-ü-7"
+
+
+def test_protobuf_response_decodes(messages):
+    _, response_cls = messages
+    data = response_cls(response_ciphertext=CIPHERTEXT).SerializeToString()
+    assert decode_get_bids_response(data) == CIPHERTEXT
+    assert decode_get_bids_response(response_cls().SerializeToString()) == b""
+
+
+def test_round_trip_through_own_codec():
+    request = encode_get_bids_request(CIPHERTEXT, "k")
+    # GetBidsRequest and GetBidsResponse share field 1, so the decoder reads it back.
+    assert decode_get_bids_response(request) == CIPHERTEXT
+
+
+def test_decode_skips_unknown_fields():
+    data = (
+        b"\x10\x96\x01"  # field 2, varint
+        + b"\x19" + b"\x00" * 8  # field 3, fixed64
+        + b"\x25" + b"\x00" * 4  # field 4, fixed32
+        + b"\x2a" + _varint(3) + b"abc"  # field 5, bytes
+        + b"\x0a" + _varint(len(CIPHERTEXT)) + CIPHERTEXT
+    )
+    assert decode_get_bids_response(data) == CIPHERTEXT
+
+
+@pytest.mark.parametrize("data", [b"\x0a\x05abc", b"\x0a\x80", b"\x0b"])
+def test_decode_rejects_malformed_messages(data):
+    with pytest.raises(ValueError):
+        decode_get_bids_response(data)
+
+
+@pytest.fixture
+def buyer_frontend():
+    grpc = pytest.importorskip("grpc")
+    from concurrent import futures
+
+    def get_bids(request, context):
+        metadata = dict(context.invocation_metadata())
+        ciphertext = decode_get_bids_response(request)  # field 1 holds the request ciphertext
+        if ciphertext == b"fail":
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "bad ciphertext")
+        reply = b"reply:" + metadata.get("x-tenant", "").encode() + b":" + ciphertext
+        return b"\x0a" + _varint(len(reply)) + reply
+
+    server = grpc.server(futures.ThreadPoolExecutor(4))
+    handler = grpc.method_handlers_generic_handler(
+        "privacy_sandbox.bidding_auction_servers.BuyerFrontEnd",
+        {"GetBids": grpc.unary_unary_rpc_method_handler(get_bids)},
+    )
+    server.add_generic_rpc_handlers([handler])
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    yield f"127.0.0.1:{port}"
+    server.stop(None)
+
+
+def _post(target, body):
+    requests = pytest.importorskip("requests")
+    from grpc_transport import GrpcAdapter
+
+    session = requests.Session()
+    session.mount(f"http://{target}", GrpcAdapter(target, keepalive_ms=0))
+    return session.post(f"http://{target}/v1/getbids", data=body, headers={"X-Tenant": "t1"}, timeout=5)
+
+
+def test_adapter_returns_rest_shaped_reply(buyer_frontend):
+    body = json.dumps({"requestCiphertext": base64.b64encode(b"secret").decode(), "keyId": "7"})
+    response = _post(buyer_frontend, body)
+    assert response.status_code == 200
+    assert base64.b64decode(response.json()["responseCiphertext"]) == b"reply:t1:secret"
+
+
+def test_adapter_maps_grpc_errors(buyer_frontend):
+    body = json.dumps({"requestCiphertext": base64.b64encode(b"fail").decode(), "keyId": "7"})
+    response = _post(buyer_frontend, body)
+    assert response.status_code == 400
+    assert response.json() == {"code": 3, "message": "bad ciphertext"}
+
+
+def test_adapter_rejects_non_get_bids_body(buyer_frontend):
+    response = _post(buyer_frontend, b'{"hello": 1}')
+    assert response.status_code == 400
+    assert response.json()["code"] == 3
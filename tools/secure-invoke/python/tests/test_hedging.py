@@ -0,0 +1,63 @@
+import threading
+import time
+
+from hedging import Hedger
+
+
+def test_slow_call_is_hedged_and_hedge_wins():
+    hedger = Hedger(1, initial_delay=0.02, budget=1.0)
+    try:
+        result = hedger.run(lambda hedge: "hedge" if hedge else time.sleep(0.3) or "primary", lambda r: True)
+    finally:
+        hedger.close()
+    assert result == "hedge"
+    assert (hedger.stats.hedged, hedger.stats.hedge_wins) == (1, 1)
+
+
+def test_hedge_is_skipped_when_no_hedge_thread_is_free():
+    hedger = Hedger(1, initial_delay=0.02, budget=1.0)
+    release = threading.Event()
+
+    def call(hedge):
+        if hedge:
+            release.wait(2.0)
+            return "hedge"
+        time.sleep(0.1)
+        return "primary"
+
+    try:
+        first = threading.Thread(target=hedger.run, args=(call, lambda r: r == "primary"))
+        first.start()
+        time.sleep(0.05)
+        # The only hedge thread is busy, so this call waits for its original copy.
+        assert hedger.run(call, lambda r: r == "primary") == "primary"
+        release.set()
+        first.join()
+    finally:
+        hedger.close()
+    assert hedger.stats.hedged == 1
+    assert hedger.stats.no_capacity == 1
+
+
+def test_budget_limits_hedges():
+    # Two hedge threads, so the first call's losing copy never takes the only slot.
+    hedger = Hedger(2, initial_delay=0.01, budget=0.0, burst=1.0)
+    try:
+        for _ in range(3):
+            hedger.run(lambda hedge: time.sleep(0.03), lambda r: True)
+    finally:
+        hedger.close()
+    assert hedger.stats.hedged == 1
+    assert hedger.stats.budget_exhausted == 2
+
+
+def test_hedge_delay_starts_when_the_call_starts_running():
+    hedger = Hedger(1, initial_delay=0.05, budget=1.0)
+    try:
+        # Keep the only primary thread busy so the next call queues behind it.
+        hedger._executor.submit(time.sleep, 0.2)
+        result = hedger.run(lambda hedge: time.sleep(0.02) or ("hedge" if hedge else "primary"), lambda r: True)
+    finally:
+        hedger.close()
+    assert result == "primary"
+    assert hedger.stats.hedged == 0
@@ -0,0 +1,122 @@
+import http.server
+import shutil
+import socket
+import ssl
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("h2")
+requests = pytest.importorskip("requests")
+
+from http2_transport import Http2Adapter  # noqa: E402
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.seen.append((self.client_address[1], self.headers.get("X-Test"), body))
+        time.sleep(self.server.delay)
+        reply = b'{"ok":true}'
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def certificate(tmp_path_factory):
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl not available")
+    directory = tmp_path_factory.mktemp("tls")
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=127.0.0.1",
+         "-keyout", str(key), "-out", str(cert)],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+@pytest.fixture
+def http1_server(certificate):
+    """HTTPS server without ALPN, so clients fall back to HTTP/1.1."""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.seen = []
+    server.delay = 0.0
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(*certificate)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _session(server, adapter):
+    origin = f"https://127.0.0.1:{server.server_port}"
+    session = requests.Session()
+    session.mount(origin, adapter)
+    return session, origin
+
+
+def test_mounted_adapter_sends_requests(http1_server):
+    adapter = Http2Adapter(verify=False)
+    session, origin = _session(http1_server, adapter)
+    try:
+        assert session.get_adapter(origin + "/v1/getbids") is adapter
+        response = session.post(origin + "/v1/getbids", data=b"encrypted", headers={"X-Test": "1"}, timeout=5)
+    finally:
+        adapter.shutdown()
+
+    assert response.status_code == 201
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {"ok": True}
+    assert response.url == origin + "/v1/getbids"
+    assert response.elapsed.total_seconds() > 0
+    assert http1_server.seen[0][1:] == ("1", b"encrypted")
+
+
+@pytest.mark.parametrize("http1_connections, expect_parallel", [(1, False), (4, True)])
+def test_http1_fallback_connections(http1_server, http1_connections, expect_parallel):
+    http1_server.delay = 0.2
+    adapter = Http2Adapter(connections=1, verify=False, http1_connections=http1_connections)
+    session, origin = _session(http1_server, adapter)
+    try:
+        with ThreadPoolExecutor(4) as pool:
+            statuses = list(pool.map(lambda _: session.post(origin, data=b"x", timeout=10).status_code, range(4)))
+    finally:
+        adapter.shutdown()
+
+    assert statuses == [201] * 4
+    ports = {port for port, _, _ in http1_server.seen}
+    assert (len(ports) > 1) is expect_parallel
+
+
+def _unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_transport_errors_map_to_requests_errors():
+    origin = f"https://127.0.0.1:{_unused_port()}"
+    adapter = Http2Adapter(verify=False)
+    session = requests.Session()
+    session.mount(origin, adapter)
+    try:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            session.post(origin, data=b"x", timeout=5)
+    finally:
+        adapter.shutdown()
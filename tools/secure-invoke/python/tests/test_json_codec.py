@@ -0,0 +1,79 @@
+import importlib
+import json
+import sys
+
+import pytest
+
+import json_codec
+
+SAMPLE = {
+    "id": 7,
+    "response": {"bids": [{"ad": "Prämie ✓", "bid": 1.5, "render": "https://r/?a=1&b=2"}], "empty": {}, "n": None},
+    "flags": [True, False],
+}
+
+
+def _installed():
+    names = []
+    for name in json_codec.CODECS:
+        try:
+            json_codec.select(name)
+        except ValueError:
+            continue
+        names.append(name)
+    return names
+
+
+def test_auto_picks_first_installed_backend():
+    assert json_codec.select("auto")[0] == _installed()[0]
+
+
+def test_auto_falls_back_to_stdlib(monkeypatch):
+    # A None entry in sys.modules makes the import raise ImportError.
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    monkeypatch.setitem(sys.modules, "msgspec", None)
+    assert json_codec.select("auto")[0] == "json"
+    assert json_codec.select("")[0] == "json"
+
+
+def test_named_backend_must_exist(monkeypatch):
+    with pytest.raises(ValueError, match="Unsupported JSON_CODEC"):
+        json_codec.select("simdjson")
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    with pytest.raises(ValueError, match="not installed"):
+        json_codec.select("orjson")
+
+
+def test_bad_env_value_warns_and_uses_auto(monkeypatch, capsys):
+    monkeypatch.setenv("JSON_CODEC", "simdjson")
+    try:
+        module = importlib.reload(json_codec)
+        assert module.BACKEND == _installed()[0]
+        assert "Unsupported JSON_CODEC 'simdjson'" in capsys.readouterr().err
+    finally:
+        monkeypatch.delenv("JSON_CODEC")
+        importlib.reload(json_codec)
+
+
+def test_stdlib_dumps_matches_json_dumps():
+    _, _, dumps, _ = json_codec.select("json")
+    assert dumps(SAMPLE) == json.dumps(SAMPLE).encode()
+
+
+@pytest.mark.parametrize("name", _installed())
+def test_backends_agree(name):
+    _, loads, dumps, dumps_sorted = json_codec.select(name)
+    _, _, _, stdlib_sorted = json_codec.select("json")
+    encoded = dumps(SAMPLE)
+    assert isinstance(encoded, bytes)
+    assert loads(encoded) == SAMPLE
+    assert json.loads(encoded) == SAMPLE
+    assert loads(json.dumps(SAMPLE)) == SAMPLE
+    assert dumps_sorted(SAMPLE) == stdlib_sorted(SAMPLE)
+
+
+@pytest.mark.parametrize("name", _installed())
+def test_loads_raises_value_error(name):
+    _, loads, _, _ = json_codec.select(name)
+    with pytest.raises(ValueError):
+        loads(b"{oops")
@@ -0,0 +1,224 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("requests")
+
+import load_balancer  # noqa: E402
+from load_balancer import BalancingAdapter, EndpointPool  # noqa: E402
+from requests.adapters import BaseAdapter  # noqa: E402
+from requests.exceptions import ConnectionError as RequestsConnectionError  # noqa: E402
+from requests.models import PreparedRequest, Response  # noqa: E402
+
+A, B, C = "http://a:1", "http://b:2", "http://c:3"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(load_balancer, "time", SimpleNamespace(monotonic=fake))
+    return fake
+
+
+def _endpoint(pool, url):
+    return next(e for e in pool.endpoints if e.url == url)
+
+
+def _call(pool, clock, latency, ok=True, exclude=None):
+    endpoint = pool.acquire(exclude)
+    started = clock.now
+    clock.now += latency
+    pool.release(endpoint, started, ok)
+    return endpoint
+
+
+def test_rejects_bad_configuration():
+    with pytest.raises(ValueError, match="At least one endpoint"):
+        EndpointPool([])
+    with pytest.raises(ValueError, match="Unsupported LB_POLICY 'random'"):
+        EndpointPool([A], policy="random")
+
+
+def test_p2c_never_picks_the_slowest_of_three(clock):
+    pool = EndpointPool([A, B, C])
+    for url, latency in ((A, 0.010), (B, 0.020), (C, 0.500)):
+        _endpoint(pool, url).latency_ewma = latency
+    picks = set()
+    for _ in range(200):
+        endpoint = pool.acquire()
+        picks.add(endpoint.url)
+        pool.release(endpoint, clock.now, ok=True)
+    assert picks == {A, B}
+
+
+def test_p2c_weighs_calls_in_flight(clock):
+    pool = EndpointPool([A, B])
+    fast, slow = _endpoint(pool, A), _endpoint(pool, B)
+    fast.latency_ewma, slow.latency_ewma = 0.010, 0.100
+    fast.in_flight = 20  # cost 0.21 vs 0.10
+    assert pool.acquire() is slow
+    assert slow.in_flight == 1 and slow.requests == 1
+
+
+def test_least_outstanding_picks_fewest_in_flight(clock):
+    pool = EndpointPool([A, B, C], policy="least_outstanding")
+    held = [pool.acquire() for _ in range(3)]
+    assert sorted(e.url for e in held) == [A, B, C]
+    pool.release(_endpoint(pool, B), clock.now, ok=True)
+    assert pool.acquire().url == B
+
+
+def test_latency_ewma(clock):
+    pool = EndpointPool([A])
+    _call(pool, clock, 0.100)
+    _call(pool, clock, 0.200)
+    assert _endpoint(pool, A).latency_ewma == pytest.approx(0.100 + 0.3 * 0.100)
+    assert pool.stats() == [
+        {"url": A, "requests": 2, "failures": 0, "ejections": 0, "latency_ewma_ms": pytest.approx(130.0)}
+    ]
+
+
+def test_consecutive_failures_eject_and_readmit(clock, capsys):
+    pool = EndpointPool([A, B], policy="least_outstanding", eject_failures=2, eject_seconds=10)
+    bad = _endpoint(pool, A)
+    for _ in range(2):
+        pool.release(pool.acquire(exclude=_endpoint(pool, B)), clock.now, ok=False)
+    assert bad.ejections == 1
+    assert bad.ejected_until == pytest.approx(clock.now + 10)
+    assert "Warning: ejected endpoint http://a:1 for 10s (2 consecutive failures)" in capsys.readouterr().err
+
+    # While ejected, every call goes to the other endpoint.
+    assert {_call(pool, clock, 0.01).url for _ in range(5)} == {B}
+
+    busy = pool.acquire()
+    assert busy.url == B
+    clock.now += 10
+    assert pool.acquire().url == A
+    assert "Re-admitted endpoint http://a:1" in capsys.readouterr().err
+    assert bad.ejected_until == 0.0
+    assert bad.consecutive_failures == 0
+
+
+def test_ejection_backs_off_until_a_success(clock):
+    pool = EndpointPool([A, B], eject_failures=1, eject_seconds=10, max_eject_seconds=25)
+    bad, good = _endpoint(pool, A), _endpoint(pool, B)
+    durations = []
+    for _ in range(3):
+        pool.release(pool.acquire(exclude=good), clock.now, ok=False)
+        durations.append(bad.ejected_until - clock.now)
+        clock.now = bad.ejected_until
+    assert durations == [10, 20, 25]
+
+    _call(pool, clock, 0.01, exclude=good)
+    pool.release(pool.acquire(exclude=good), clock.now, ok=False)
+    assert bad.ejected_until - clock.now == 10
+
+
+def test_last_healthy_endpoint_is_never_ejected(clock):
+    pool = EndpointPool([A, B], eject_failures=1)
+    pool.release(pool.acquire(exclude=_endpoint(pool, B)), clock.now, ok=False)
+    pool.release(pool.acquire(exclude=_endpoint(pool, A)), clock.now, ok=False)
+    assert _endpoint(pool, A).ejected_until > 0
+    assert _endpoint(pool, B).ejected_until == 0.0
+    assert _endpoint(pool, B).ejections == 0
+
+
+def test_slow_endpoint_is_ejected(clock):
+    pool = EndpointPool([A, B, C], slow_factor=3.0, min_samples=2)
+    for url in (B, C):
+        _endpoint(pool, url).latency_ewma = 0.010
+    slow = _endpoint(pool, A)
+    for expected_ejections in (0, 1):
+        slow.in_flight += 1
+        pool.release(slow, clock.now - 0.100, ok=True)
+        assert slow.ejections == expected_ejections
+    assert slow.ejected_until > clock.now
+
+
+def test_all_ejected_uses_the_one_due_back_first(clock):
+    pool = EndpointPool([A, B, C])
+    _endpoint(pool, B).ejected_until = clock.now + 5
+    _endpoint(pool, C).ejected_until = clock.now + 1
+    assert pool.acquire(exclude=_endpoint(pool, A)).url == C
+
+
+class RecordingAdapter(BaseAdapter):
+    def __init__(self, status=200, error=None):
+        super().__init__()
+        self.status = status
+        self.error = error
+        self.urls = []
+
+    def send(self, request, **kwargs):
+        self.urls.append(request.url)
+        if self.error is not None:
+            raise self.error
+        response = Response()
+        response.status_code = self.status
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def _request(url):
+    request = PreparedRequest()
+    request.prepare(method="POST", url=url, data=b"x")
+    return request
+
+
+def test_adapter_routes_to_chosen_endpoint():
+    pool = EndpointPool([A, B], policy="least_outstanding")
+    adapters = {A: RecordingAdapter(), B: RecordingAdapter()}
+    balancer = BalancingAdapter(pool, A, adapters)
+    _endpoint(pool, A).in_flight = 1
+
+    response = balancer.send(_request(A + "/v1/getbids?x=1"))
+
+    assert response.status_code == 200
+    assert adapters[B].urls == [B + "/v1/getbids?x=1"]
+    assert adapters[A].urls == []
+    assert _endpoint(pool, B).in_flight == 0
+
+
+def test_adapter_retries_connection_errors_once_elsewhere():
+    pool = EndpointPool([A, B], policy="least_outstanding")
+    adapters = {A: RecordingAdapter(error=RequestsConnectionError("refused")), B: RecordingAdapter()}
+    _endpoint(pool, B).in_flight = 1  # A is chosen first.
+
+    response = BalancingAdapter(pool, A, adapters).send(_request(A + "/v1/getbids"))
+
+    assert response.url == B + "/v1/getbids"
+    assert _endpoint(pool, A).failures == 1
+    assert _endpoint(pool, A).in_flight == 0
+
+
+def test_adapter_gives_up_after_one_retry():
+    error = RequestsConnectionError("refused")
+    pool = EndpointPool([A, B])
+    adapters = {A: RecordingAdapter(error=error), B: RecordingAdapter(error=error)}
+    with pytest.raises(RequestsConnectionError):
+        BalancingAdapter(pool, A, adapters).send(_request(A + "/v1/getbids"))
+    assert sum(e.failures for e in pool.endpoints) == 2
+
+    single = EndpointPool([A])
+    with pytest.raises(RequestsConnectionError):
+        BalancingAdapter(single, A, {A: RecordingAdapter(error=error)}).send(_request(A))
+    assert single.endpoints[0].requests == 1
+
+
+def test_adapter_counts_5xx_as_failure():
+    pool = EndpointPool([A])
+    adapters = {A: RecordingAdapter(status=503)}
+    assert BalancingAdapter(pool, A, adapters).send(_request(A)).status_code == 503
+    assert pool.endpoints[0].failures == 1
+    assert pool.endpoints[0].consecutive_failures == 1
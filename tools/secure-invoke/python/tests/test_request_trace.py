@@ -0,0 +1,151 @@
+import datetime
+import http.server
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import request_trace
+from request_trace import RequestTrace, TraceSink, install_connect_probe, instrument, percentile, read_trace, summarize
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(request_trace, "time", SimpleNamespace(perf_counter=fake))
+    return fake
+
+
+def test_phase_timings(clock):
+    trace = RequestTrace(7, {"a": 1})
+    clock.now = 0.010
+    trace.start()
+    clock.now = 0.030
+    trace.worker_ready()
+    clock.now = 0.050
+    sent_at = trace.on_send(SimpleNamespace(body=b"x" * 40))
+    trace.on_connect(0.010)
+    clock.now = 0.120
+    response = SimpleNamespace(
+        url="https://buyer:51052/v1/getbids", elapsed=datetime.timedelta(milliseconds=50), _content=b"y" * 30
+    )
+    trace.on_response(sent_at, response)
+    clock.now = 0.150
+    row = trace.finish({"bids": []}, None)
+
+    assert row["status"] == "ok"
+    assert row["queue_wait_ms"] == pytest.approx(10.0)
+    assert row["setup_ms"] == pytest.approx(20.0)
+    assert row["encrypt_ms"] == pytest.approx(20.0)
+    assert row["connect_ms"] == pytest.approx(10.0)
+    # Headers arrived 50 ms after the send, 10 ms of which was connecting.
+    assert row["ttfb_ms"] == pytest.approx(40.0)
+    assert row["transfer_ms"] == pytest.approx(20.0)
+    assert row["decrypt_ms"] == pytest.approx(30.0)
+    assert row["total_ms"] == pytest.approx(140.0)
+    assert row["attempts"] == 1
+    assert row["endpoint"] == "https://buyer:51052"
+    assert row["request_bytes"] == len(request_trace.dumps({"a": 1}))
+    assert row["wire_request_bytes"] == 40
+    assert row["wire_response_bytes"] == 30
+    assert row["response_bytes"] == len(request_trace.dumps({"bids": []}))
+
+
+def test_unobserved_fields_are_null(clock):
+    trace = RequestTrace(1)
+    trace.start()
+    clock.now = 0.005
+    trace.worker_ready(instrumented=False)
+    clock.now = 0.020
+    row = trace.finish(None, "boom")
+
+    assert row["status"] == "error"
+    assert row["attempts"] is None
+    assert row["total_ms"] == pytest.approx(20.0)
+    for field in ("encrypt_ms", "connect_ms", "ttfb_ms", "transfer_ms", "decrypt_ms", "response_bytes"):
+        assert row[field] is None
+
+
+def test_expired_request(clock):
+    trace = RequestTrace(3)
+    clock.now = 0.250
+    row = trace.expire()
+    assert row["status"] == "deadline_exceeded"
+    assert row["queue_wait_ms"] == pytest.approx(250.0)
+    assert row["attempts"] == 0
+    assert row["total_ms"] is None
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = b'{"bids":[]}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_instrumented_session_records_http_phases():
+    requests = pytest.importorskip("requests")
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        install_connect_probe()
+        session = requests.Session()
+        trace = RequestTrace(5, {"a": 1})
+        trace.start()
+        trace.worker_ready(instrument([session]))
+        url = f"http://127.0.0.1:{server.server_port}/v1/getbids"
+        session.post(url, data=b"encrypted-body")
+        row = trace.finish({"bids": []}, None)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert row["attempts"] == 1
+    assert row["endpoint"] == f"http://127.0.0.1:{server.server_port}"
+    assert row["wire_request_bytes"] == len(b"encrypted-body")
+    assert row["wire_response_bytes"] == len(b'{"bids":[]}')
+    for field in ("connect_ms", "ttfb_ms", "transfer_ms", "encrypt_ms", "decrypt_ms", "total_ms"):
+        assert row[field] is not None and row[field] >= 0
+    # finish() clears the trace, so later sends on this thread are not recorded.
+    assert request_trace.current() is None
+
+
+def test_sink_and_summary(tmp_path):
+    sink = TraceSink(tmp_path / "trace.jsonl")
+    for request_id, total in ((1, 5.0), (2, 50.0), (3, 20.0)):
+        sink.write({"type": "request", "id": request_id, "status": "ok", "attempts": 1, "total_ms": total,
+                    "ttfb_ms": total / 2})
+    sink.write({"type": "batch", "kms_ms": 3.0, "wall_ms": 60.0, "workers": 2})
+    sink.close()
+    # Late rows from losing hedged calls are dropped rather than raising.
+    sink.write({"type": "request", "id": 9})
+
+    rows = list(read_trace(tmp_path / "trace.jsonl"))
+    assert len(rows) == 4
+    text = summarize(rows, top=2)
+    assert "Requests: 3" in text
+    assert "Batch:    kms_ms=3.0 wall_ms=60.0 workers=2" in text
+    slowest = text.split("Slowest 2 requests")[1].splitlines()[2:]
+    assert [line.split()[0] for line in slowest] == ["2", "3"]
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile(values, 100) == 100.0
+    assert percentile([4.0], 90) == 4.0
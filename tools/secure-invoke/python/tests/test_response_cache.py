@@ -0,0 +1,68 @@
+import stat
+
+from response_cache import ResponseCache, request_key
+
+SCOPE = {"buyer_hosts": ["https://a:51052"], "protocol": "rest", "headers": {}}
+
+
+def test_key_ignores_key_order():
+    assert request_key({"a": 1, "b": {"c": 2, "d": 3}}, SCOPE) == request_key({"b": {"d": 3, "c": 2}, "a": 1}, SCOPE)
+
+
+def test_key_depends_on_body():
+    assert request_key({"a": 1}, SCOPE) != request_key({"a": 2}, SCOPE)
+
+
+def test_key_depends_on_scope():
+    body = {"a": 1}
+    keys = {
+        request_key(body, SCOPE),
+        request_key(body, {**SCOPE, "buyer_hosts": ["https://b:51052"]}),
+        request_key(body, {**SCOPE, "protocol": "grpc"}),
+        request_key(body, {**SCOPE, "headers": {"X-Tenant": "1"}}),
+        request_key(body),
+    }
+    assert len(keys) == 5
+
+
+def test_cache_key_uses_scope():
+    cache = ResponseCache(scope=SCOPE)
+    assert cache.key({"a": 1}) == request_key({"a": 1}, SCOPE)
+
+
+def test_only_successes_are_cached():
+    cache = ResponseCache()
+    assert cache.get_or_compute("k", lambda: (None, "boom")) == (None, "boom")
+    assert cache.get("k") is None
+    assert cache.get_or_compute("k", lambda: ({"bids": []}, None)) == ({"bids": []}, None)
+    assert cache.get("k") == {"bids": []}
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_save_is_owner_only_and_round_trips(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    # A leftover temporary file with a wider mode must not leak into the cache file.
+    leftover = tmp_path / "cache.jsonl.tmp"
+    leftover.write_bytes(b"")
+    leftover.chmod(0o644)
+
+    cache = ResponseCache(ttl=0)
+    cache.put("k", {"bids": [{"bid": 1.5}]})
+    cache.save(path)
+
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    restored = ResponseCache()
+    assert restored.load(path) == 1
+    assert restored.get("k") == {"bids": [{"bid": 1.5}]}
+
+
+def test_load_skips_expired_and_corrupt_rows(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    path.write_bytes(
+        b'{"key":"old","expires_at":1,"response":{}}\n'
+        b"not json\n"
+        b'{"key":"new","expires_at":null,"response":{"bids":[]}}\n'
+    )
+    cache = ResponseCache()
+    assert cache.load(path) == 1
+    assert cache.get("new") == {"bids": []}
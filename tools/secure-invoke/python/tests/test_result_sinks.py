@@ -0,0 +1,122 @@
+import random
+
+import pytest
+
+from result_sinks import SortedLogWriter, StreamingLogWriter, iter_rows, parse_fields, write_rows
+
+# Shapes that broke schema inference: empty lists, empty objects, keys that
+# only appear in later rows, and success and failure rows side by side.
+HETEROGENEOUS_ROWS = [
+    {"id": 1, "response": {"bids": []}},
+    {"id": 2, "response": {}},
+    {"id": 3, "response": {"bids": [{"ad": {"x": 1}, "bid": 1.5}], "debug": {"late": True}}},
+    {"id": 4, "response": {"bids": [{"ad": None, "bid": 2}]}},
+    {"id": 5, "error": {"message": "upstream failed", "reason": "request_failed"}},
+]
+
+
+def _formats():
+    formats = ["jsonl", "jsonl.gz", "records"]
+    for fmt, module in (("parquet", "pyarrow"), ("jsonl.zst", "zstandard")):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        formats.append(fmt)
+    return formats
+
+
+@pytest.mark.parametrize("fmt", _formats())
+@pytest.mark.parametrize("row_group_size", [1, 2, 100])
+def test_heterogeneous_rows_round_trip(tmp_path, fmt, row_group_size):
+    path = write_rows(tmp_path, "log", HETEROGENEOUS_ROWS, fmt, row_group_size=row_group_size)
+    assert list(iter_rows(path, fmt)) == HETEROGENEOUS_ROWS
+
+
+@pytest.mark.parametrize("fmt", _formats())
+def test_empty_log_is_readable(tmp_path, fmt):
+    path = write_rows(tmp_path, "log", [], fmt)
+    assert list(iter_rows(path, fmt)) == []
+
+
+def test_projection(tmp_path):
+    fields = parse_fields("bids[].bid, debug")
+    assert fields == {"bids": {"[]": {"bid": {}}}, "debug": {}}
+
+    writer = SortedLogWriter(tmp_path, "success_log", fields=fields)
+    writer.write({"id": 1, "response": {"bids": [{"ad": 1, "bid": 2}], "debug": 3, "other": 4}})
+    writer.write({"id": 0, "response": {"bids": {"not": "a list"}}})
+    path = writer.close()
+
+    assert list(iter_rows(path, "jsonl")) == [
+        {"id": 0, "response": {"bids": None}},
+        {"id": 1, "response": {"bids": [{"bid": 2}], "debug": 3}},
+    ]
+
+
+@pytest.mark.parametrize("fmt", _formats())
+def test_sorted_log_writer_spills_and_merges(tmp_path, fmt):
+    ids = list(range(50))
+    random.Random(7).shuffle(ids)
+    writer = SortedLogWriter(tmp_path, "success_log", fmt, row_group_size=4, run_size=6)
+    for request_id in ids:
+        row = HETEROGENEOUS_ROWS[request_id % len(HETEROGENEOUS_ROWS)]
+        writer.write({**row, "id": request_id})
+    path = writer.close()
+
+    rows = list(iter_rows(path, fmt))
+    assert [row["id"] for row in rows] == list(range(50))
+    assert rows[2] == {**HETEROGENEOUS_ROWS[2], "id": 2}
+    assert writer.count == 50
+    # Spilled runs are removed once merged.
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+
+
+def test_sorted_log_writer_falls_back_to_jsonl(tmp_path, capsys):
+    pytest.importorskip("pyarrow")
+    writer = SortedLogWriter(tmp_path, "success_log", "parquet", run_size=2)
+    for request_id in (3, 1, 2):
+        writer.write({"id": request_id, "unexpected": True})
+    path = writer.close()
+
+    assert path.name == "success_log.jsonl"
+    assert [row["id"] for row in iter_rows(path, "jsonl")] == [1, 2, 3]
+    assert not (tmp_path / "success_log.parquet").exists()
+    assert "writing jsonl instead" in capsys.readouterr().err
+
+
+def test_sorted_log_writer_does_not_spill_when_batch_fits(tmp_path):
+    writer = SortedLogWriter(tmp_path, "success_log", "records", row_group_size=4, run_size=100)
+    for request_id in (2, 0, 1):
+        writer.write({"id": request_id, "response": {}})
+
+    assert list(tmp_path.iterdir()) == []
+    path = writer.close()
+    assert [row["id"] for row in iter_rows(path, "records")] == [0, 1, 2]
+
+
+@pytest.mark.parametrize("fmt", _formats())
+def test_streaming_log_writer_keeps_completion_order(tmp_path, fmt):
+    ids = [5, 3, 9, 0, 7, 1]
+    writer = StreamingLogWriter(tmp_path, "success_log", fmt, row_group_size=2)
+    for request_id in ids:
+        writer.write({"id": request_id, "response": {"bids": [{"bid": request_id}]}})
+    path = writer.close()
+
+    assert [row["id"] for row in iter_rows(path, fmt)] == ids
+    assert writer.count == len(ids)
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+
+
+def test_streaming_log_writer_falls_back_to_jsonl(tmp_path, capsys):
+    pytest.importorskip("pyarrow")
+    writer = StreamingLogWriter(tmp_path, "success_log", "parquet")
+    writer.write({"id": 1, "response": {}})
+    writer.write({"id": 2, "unexpected": True})
+    writer.write({"id": 3, "response": {}})
+    path = writer.close()
+
+    assert path.name == "success_log.jsonl"
+    assert [row["id"] for row in iter_rows(path, "jsonl")] == [2, 3]
+    assert [row["id"] for row in iter_rows(tmp_path / "success_log.parquet", "parquet")] == [1]
+    assert "writing jsonl instead" in capsys.readouterr().err
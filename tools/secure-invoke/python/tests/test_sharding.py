@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from result_sinks import iter_rows, write_rows
+from sharding import find_shard_logs, hash_shard, iter_shard_lines, merge_shard_logs, shard_stem, validate_shard
+
+
+@pytest.fixture
+def batch_file(tmp_path):
+    # Uneven line lengths so byte ranges split lines in the middle.
+    lines = [f'{{"id":{i},"request":{{"pad":"{"x" * (i * 7 % 23)}"}}}}\n'.encode() for i in range(40)]
+    path = tmp_path / "batch.jsonl"
+    path.write_bytes(b"".join(lines))
+    return path, lines
+
+
+@pytest.mark.parametrize("mode", ["range", "hash"])
+@pytest.mark.parametrize("count", [1, 2, 3, 7, 64])
+def test_shards_partition_every_line_once(batch_file, mode, count):
+    path, lines = batch_file
+    seen = []
+    for index in range(count):
+        seen.extend(line for _, line in iter_shard_lines(path, index, count, mode))
+    assert sorted(seen) == sorted(lines)
+
+
+def test_range_shard_without_trailing_newline(tmp_path):
+    path = tmp_path / "batch.jsonl"
+    path.write_bytes(b'{"id":1}\n{"id":2}\n{"id":3}')
+    seen = [line for index in range(2) for _, line in iter_shard_lines(path, index, 2, "range")]
+    assert seen == [b'{"id":1}\n', b'{"id":2}\n', b'{"id":3}']
+
+
+def test_hash_shard_follows_the_request_id(tmp_path):
+    path = tmp_path / "batch.jsonl"
+    # Same ids, different key order and spacing: each id must stay on its shard.
+    path.write_bytes(b'{"id": 11, "request": {}}\n{"request": {"a": 1}, "id": 12}\n{ "id":13 }\n')
+    for index in range(4):
+        kept = [line for _, line in iter_shard_lines(path, index, 4, "hash")]
+        assert all(hash_shard(json.loads(line)["id"], 4) == index for line in kept)
+
+
+def test_hash_shard_sends_lines_without_an_id_to_shard_zero(tmp_path):
+    path = tmp_path / "batch.jsonl"
+    path.write_bytes(b'not json\n{"request": {}}\n')
+    assert len(list(iter_shard_lines(path, 0, 3, "hash"))) == 2
+    assert list(iter_shard_lines(path, 1, 3, "hash")) == []
+
+
+def test_validate_shard():
+    validate_shard(0, 1, "range")
+    with pytest.raises(ValueError):
+        validate_shard(2, 2, "range")
+    with pytest.raises(ValueError):
+        validate_shard(0, 0, "range")
+    with pytest.raises(ValueError):
+        validate_shard(0, 2, "modulo")
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "jsonl.gz", "records"])
+def test_merge_shard_logs(tmp_path, fmt):
+    count = 3
+    for index in range(count):
+        rows = [{"id": i, "response": {"shard": index}} for i in range(index, 30, count)]
+        write_rows(tmp_path, shard_stem("success_log", index, count), rows, fmt)
+
+    output, merged = merge_shard_logs(tmp_path, "success_log", fmt)
+
+    assert merged == 30
+    rows = list(iter_rows(output, fmt))
+    assert [row["id"] for row in rows] == list(range(30))
+    assert rows[4] == {"id": 4, "response": {"shard": 1}}
+
+
+def test_missing_shard_log_is_an_error(tmp_path):
+    for index in (0, 2):
+        write_rows(tmp_path, shard_stem("success_log", index, 3), [], "jsonl")
+    with pytest.raises(ValueError, match=r"missing shard logs for indexes \[1\]"):
+        find_shard_logs(tmp_path, "success_log", "jsonl")
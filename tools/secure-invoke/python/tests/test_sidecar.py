@@ -0,0 +1,109 @@
+import asyncio
+import re
+
+import pytest
+
+from json_codec import dumps
+from sidecar import KeyCache, SidecarServer
+
+
+class EchoWorker:
+    def process_single_request(self, request_data, public_key):
+        return {"echo": request_data, "key_id": public_key["key_id"]}
+
+
+async def _exchange(raw: bytes, max_body_bytes: int = 1024):
+    """Send ``raw`` to a fresh sidecar; return (status line, response bytes until close or timeout)."""
+    sidecar = SidecarServer(EchoWorker, KeyCache(lambda: {"key_id": "7", "public_key": "pk"}), workers=1,
+                            max_body_bytes=max_body_bytes)
+    server = await asyncio.start_server(sidecar._handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(raw)
+        await writer.drain()
+        data = b""
+        try:
+            while True:
+                chunk = await asyncio.wait_for(reader.read(65536), timeout=0.5)
+                if not chunk:
+                    break
+                data += chunk
+        except asyncio.TimeoutError:
+            pass
+        writer.close()
+        return data
+    finally:
+        server.close()
+        await server.wait_closed()
+        sidecar.close()
+
+
+def exchange(raw: bytes, **kwargs) -> bytes:
+    return asyncio.run(_exchange(raw, **kwargs))
+
+
+def _statuses(data: bytes):
+    # Responses follow each other's bodies directly, without a line break.
+    return re.findall(rb"HTTP/1\.1 (\d{3}) ", data)
+
+
+@pytest.mark.parametrize(
+    "raw, status",
+    [
+        (b"GARBAGE\r\n\r\n", b"400"),
+        (b"POST / HTTP/1.1\r\nContent-Length: abc\r\n\r\n{}", b"400"),
+        (b"POST / HTTP/1.1\r\nContent-Length: -5\r\n\r\n{}", b"400"),
+        (b"POST / HTTP/1.1\r\nContent-Length: 1e3\r\n\r\n{}", b"400"),
+        (b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n2\r\n{}\r\n0\r\n\r\n", b"411"),
+        (b"POST / HTTP/1.1\r\nTransfer-Encoding: gzip\r\n\r\n", b"501"),
+        (b"POST / HTTP/1.1\r\nContent-Length: 2048\r\n\r\n", b"413"),
+        (b"POST / HTTP/1.1\r\nContent-Length: 5\r\n\r\n{oops", b"400"),
+        (b"PUT / HTTP/1.1\r\nContent-Length: 0\r\n\r\n", b"405"),
+    ],
+)
+def test_malformed_requests(raw, status):
+    assert _statuses(exchange(raw))[0] == status
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        b"POST / HTTP/1.1\r\nContent-Length: abc\r\n\r\nGET /healthz HTTP/1.1\r\n\r\n",
+        b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n0\r\n\r\nGET /healthz HTTP/1.1\r\n\r\n",
+    ],
+)
+def test_unframed_body_closes_connection(raw):
+    # The rest of the stream cannot be framed, so nothing after it is served.
+    data = exchange(raw)
+    assert len(_statuses(data)) == 1
+    assert b"Connection: close" in data
+
+
+@pytest.mark.parametrize(
+    "raw, status",
+    [
+        (b"GET /" + b"a" * 70000 + b" HTTP/1.1\r\n\r\n", b"400"),
+        (b"GET /healthz HTTP/1.1\r\nX-Big: " + b"a" * 70000 + b"\r\n\r\n", b"431"),
+        (b"GET /healthz HTTP/1.1\r\n" + b"X-H: 1\r\n" * 101 + b"\r\n", b"431"),
+    ],
+)
+def test_oversized_head_closes_connection(raw, status):
+    data = exchange(raw)
+    assert _statuses(data) == [status]
+    assert b"Connection: close" in data
+
+
+def test_header_count_at_limit_is_served():
+    data = exchange(b"GET /healthz HTTP/1.1\r\n" + b"X-H: 1\r\n" * 99 + b"Connection: close\r\n\r\n")
+    assert _statuses(data) == [b"200"]
+
+
+def test_keep_alive_serves_pipelined_requests():
+    data = exchange(
+        b"POST /v1/getbids HTTP/1.1\r\nContent-Length: 8\r\n\r\n{\"a\":1}\n"
+        b"GET /healthz HTTP/1.1\r\nConnection: close\r\n\r\n"
+    )
+    assert _statuses(data) == [b"200", b"200"]
+    assert dumps({"echo": {"a": 1}, "key_id": "7"}) in data
+    assert dumps({"status": "ok", "key_id": "7"}) in data
@@ -0,0 +1,53 @@
+import os
+import time
+
+from spool import SpoolDirectory
+
+
+def _drop(spool, name, data=b'{"id":1}\n', age=10.0):
+    path = spool.incoming / name
+    path.write_bytes(data)
+    past = time.time() - age
+    os.utime(path, (past, past))
+    return path
+
+
+def test_resubmitted_name_does_not_collide(tmp_path):
+    spool = SpoolDirectory(tmp_path, settle=0)
+    claimed = []
+    for data in (b'{"id":1}\n', b'{"id":2}\n'):
+        claimed.append(spool.claim(_drop(spool, "batch.jsonl", data)))
+
+    first, second = claimed
+    assert first != second
+    assert first.read_bytes() == b'{"id":1}\n'
+    assert second.read_bytes() == b'{"id":2}\n'
+    assert first.name.startswith("batch.") and first.suffix == ".jsonl"
+
+    assert spool.results_dir(first) != spool.results_dir(second)
+    assert spool.retire(first) != spool.retire(second, ok=False)
+    assert len(list(spool.done.iterdir())) == 1
+    assert len(list(spool.failed.iterdir())) == 1
+    assert len(list(spool.results.iterdir())) == 2
+    assert list(spool.processing.iterdir()) == []
+
+
+def test_claim_lost_race(tmp_path):
+    spool = SpoolDirectory(tmp_path)
+    path = _drop(spool, "batch.jsonl")
+    assert spool.claim(path) is not None
+    assert spool.claim(path) is None
+
+
+def test_scan_skips_unsettled_and_ignored_names(tmp_path):
+    spool = SpoolDirectory(tmp_path, settle=5.0)
+    _drop(spool, "old.jsonl", age=20.0)
+    _drop(spool, "older.jsonl", age=30.0)
+    _drop(spool, "fresh.jsonl", age=0.0)
+    for name in (".hidden.jsonl", "upload.jsonl.tmp", "upload.jsonl.part", "notes.txt"):
+        _drop(spool, name)
+
+    ready, next_settle = spool.scan()
+
+    assert [p.name for p in ready] == ["older.jsonl", "old.jsonl"]
+    assert next_settle is not None and 0 < next_settle <= 5.0